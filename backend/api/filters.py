@@ -1,11 +1,13 @@
 from django_filters.rest_framework import FilterSet, filters
-from rest_framework.filters import SearchFilter
 
-from recipes.models import Recipe
+from recipes import fulltext
+from recipes.models import Recipe, TagRecipe
+from recipes.tags import get_tag_ids
 
 
 class RecipeFilter(FilterSet):
-    tags = filters.AllValuesMultipleFilter(field_name='tags__slug')
+    tags = filters.CharFilter(method='filter_tags')
+    search = filters.CharFilter(method='filter_search')
     is_favorited = filters.BooleanFilter(method='filter_is_favorited')
     is_in_shopping_cart = filters.BooleanFilter(
         method='filter_is_in_shopping_cart'
@@ -13,18 +15,31 @@ class RecipeFilter(FilterSet):
 
     class Meta:
         model = Recipe
-        fields = ('tags', 'author', 'is_favorited', 'is_in_shopping_cart')
+        fields = (
+            'tags', 'author', 'is_favorited', 'is_in_shopping_cart', 'search'
+        )
+
+    def filter_tags(self, queryset, name, value):
+        tag_ids = get_tag_ids(self.request.query_params.getlist(name))
+        if not tag_ids:
+            return queryset.none()
+        return queryset.filter(id__in=TagRecipe.objects.filter(
+            tag_id__in=tag_ids
+        ).values('recipe_id'))
 
     def filter_is_favorited(self, queryset, name, value):
         if value:
-            return queryset.filter(favorites__user=self.request.user)
+            if self.request.user.is_anonymous:
+                return queryset.none()
+            return queryset.filter(is_favorited=True)
         return queryset
 
     def filter_is_in_shopping_cart(self, queryset, name, value):
         if value:
-            return queryset.filter(shopping_carts__user=self.request.user)
+            if self.request.user.is_anonymous:
+                return queryset.none()
+            return queryset.filter(is_in_shopping_cart=True)
         return queryset
 
-
-class IngredientSearchFilter(SearchFilter):
-    search_param = 'name'
+    def filter_search(self, queryset, name, value):
+        return fulltext.search(queryset, value)
@@ -0,0 +1,254 @@
+import json
+import re
+from collections import defaultdict
+
+from django.apps import apps
+from django.core.management.base import CommandError
+from django.db import connection, transaction
+from django.test import Client
+
+from .bench_api import Command as BenchCommand
+from recipes.models import Recipe
+
+SQLITE_SCAN = re.compile(r'^SCAN (?:TABLE )?(\w+)(?: AS (\w+))?')
+FROM_TABLE = re.compile(r'\bFROM "(\w+)"')
+PREDICATE = r'(?:"{table}"|{alias})\."(\w+)" (=|IN|IS|>|<|>=|<=|LIKE)\b'
+ORDER_COLUMN = r'(?:"{table}"|{alias})\."(\w+)" (ASC|DESC)'
+EXPLAINED = ('SELECT', 'UPDATE', 'DELETE')
+ADVISED_APPS = ('recipes', 'users')
+
+
+def strip_subqueries(sql):
+    # Drops every parenthesized SELECT so that only the outer statement's
+    # tables, predicates and ordering are left.
+    parts, depth, index = [], 0, 0
+    while index < len(sql):
+        if depth:
+            depth += {'(': 1, ')': -1}.get(sql[index], 0)
+        elif sql.startswith('(SELECT ', index):
+            depth = 1
+        else:
+            parts.append(sql[index])
+        index += 1
+    return ''.join(parts)
+
+
+class Command(BenchCommand):
+    help = ('Run representative API requests in a rolled back transaction, '
+            'EXPLAIN every statement and suggest missing indexes.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--min-rows', type=int, default=1000,
+            help='Ignore scans and sorts over tables with fewer rows.'
+        )
+        parser.add_argument(
+            '--scenario', nargs='+',
+            help='Only run the given scenarios.'
+        )
+
+    def get_requests(self):
+        recipe = Recipe.objects.order_by('-id').first()
+        if recipe is None:
+            raise CommandError('No recipes, run generate_data first.')
+        word = re.findall(r'\w+', recipe.name)
+        requests = {
+            name: ('get', url)
+            for name, url in self.get_scenarios().items()
+        }
+        requests.update({
+            'recipe-list-favorited': ('get', '/api/recipes/?is_favorited=1'),
+            'recipe-list-cart': ('get', '/api/recipes/?is_in_shopping_cart=1'),
+            'recipe-search': (
+                'get', f'/api/recipes/?search={word[0] if word else "a"}'
+            ),
+            'user-list': ('get', '/api/users/?limit=6'),
+            'favorite-add': ('post', f'/api/recipes/{recipe.id}/favorite/'),
+            'favorite-remove': (
+                'delete', f'/api/recipes/{recipe.id}/favorite/'
+            ),
+            'cart-add': ('post', f'/api/recipes/{recipe.id}/shopping_cart/'),
+            'subscribe': ('post', f'/api/users/{recipe.author_id}/subscribe/'),
+        })
+        return requests
+
+    def capture(self, requests):
+        statements = {}
+        scenario = None
+
+        def wrapper(execute, sql, params, many, context):
+            if sql.lstrip().upper().startswith(EXPLAINED):
+                statements.setdefault(sql, (scenario, params))
+            return execute(sql, params, many, context)
+
+        client = Client()
+        with connection.execute_wrapper(wrapper):
+            for scenario, (method, url) in requests.items():
+                response = getattr(client, method)(url, **self.headers)
+                if response.streaming:
+                    b''.join(response.streaming_content)
+        return statements
+
+    def explain(self, cursor, sql, params):
+        # Returns (table, alias, detail) for every scan or sort in the plan.
+        if connection.vendor == 'sqlite':
+            cursor.execute('EXPLAIN QUERY PLAN ' + sql, params)
+            findings = []
+            for row in cursor.fetchall():
+                detail = row[-1]
+                match = SQLITE_SCAN.match(detail)
+                if match:
+                    findings.append((match.group(1), match.group(2), detail))
+                elif detail.startswith('USE TEMP B-TREE'):
+                    findings.append((None, None, detail))
+            return findings
+        if connection.vendor == 'postgresql':
+            cursor.execute('EXPLAIN (FORMAT JSON) ' + sql, params)
+            plan = cursor.fetchone()[0]
+            if isinstance(plan, str):
+                plan = json.loads(plan)
+            findings = []
+            nodes = [plan[0]['Plan']]
+            while nodes:
+                node = nodes.pop()
+                nodes.extend(node.get('Plans', ()))
+                if node['Node Type'] == 'Seq Scan':
+                    findings.append((
+                        node['Relation Name'], node.get('Alias'), 'Seq Scan'
+                    ))
+                elif node['Node Type'] in ('Sort', 'Incremental Sort'):
+                    findings.append((
+                        None, None,
+                        'Sort on ' + ', '.join(node.get('Sort Key', ()))
+                    ))
+            return findings
+        raise CommandError(f'EXPLAIN is not supported on {connection.vendor}.')
+
+    def get_models(self):
+        return {
+            model._meta.db_table: model
+            for app_label in ADVISED_APPS
+            for model in apps.get_app_config(app_label).get_models()
+        }
+
+    def get_row_count(self, cursor, table):
+        if table not in self.row_counts:
+            cursor.execute(
+                f'SELECT COUNT(*) FROM {connection.ops.quote_name(table)}'
+            )
+            self.row_counts[table] = cursor.fetchone()[0]
+        return self.row_counts[table]
+
+    def get_index_columns(self, cursor, table):
+        if table not in self.index_columns:
+            constraints = connection.introspection.get_constraints(
+                cursor, table
+            )
+            self.index_columns[table] = [
+                constraint['columns'] for constraint in constraints.values()
+                if constraint['index'] or constraint['unique']
+                or constraint['primary_key']
+            ]
+        return self.index_columns[table]
+
+    def suggest(self, cursor, model, table, alias, sql):
+        alias = re.escape(alias or f'"{table}"')
+        primary_key = model._meta.pk.column
+        columns = []
+        for column, operator in re.findall(
+            PREDICATE.format(table=table, alias=alias), sql
+        ):
+            if column not in columns and column != primary_key:
+                columns.append(column)
+        orders = []
+        if ' ORDER BY ' in sql:
+            order_by = sql.rsplit(' ORDER BY ', 1)[1].split(' LIMIT ')[0]
+            orders = [
+                (column, direction) for column, direction in re.findall(
+                    ORDER_COLUMN.format(table=table, alias=alias), order_by
+                ) if column not in columns and column != primary_key
+            ]
+        if not columns and not orders:
+            return None
+        index_columns = columns + [column for column, _ in orders]
+        for existing in self.get_index_columns(cursor, table):
+            if existing[:len(index_columns)] == index_columns:
+                return None
+        names = {
+            field.column: field.name for field in model._meta.concrete_fields
+        }
+        fields = [names.get(column, column) for column in columns] + [
+            ('-' if direction == 'DESC' else '') + names.get(column, column)
+            for column, direction in orders
+        ]
+        name = '_'.join(
+            [model._meta.model_name] + [field.lstrip('-') for field in fields]
+        )[:26] + '_idx'
+        return (f'models.Index(fields={fields!r}, '
+                f'name={name!r})')
+
+    def handle(self, *args, **options):
+        self.row_counts, self.index_columns = {}, {}
+        models = self.get_models()
+        suggestions = defaultdict(set)
+        flagged = 0
+        with transaction.atomic():
+            self.headers = {
+                'HTTP_AUTHORIZATION': f'Token {self.get_token()}'
+            }
+            requests = self.get_requests()
+            if options['scenario']:
+                unknown = set(options['scenario']) - set(requests)
+                if unknown:
+                    raise CommandError(
+                        f'Unknown scenarios: {sorted(unknown)}'
+                    )
+                requests = {
+                    name: request for name, request in requests.items()
+                    if name in options['scenario']
+                }
+            statements = self.capture(requests)
+            with connection.cursor() as cursor:
+                for sql, (scenario, params) in statements.items():
+                    outer = strip_subqueries(sql)
+                    main_table = FROM_TABLE.search(outer)
+                    for table, alias, detail in self.explain(
+                        cursor, sql, params
+                    ):
+                        # An index walk that stops at LIMIT is not a scan.
+                        if 'USING' in detail and ' LIMIT ' in outer:
+                            continue
+                        statement = sql if table else outer
+                        table = table or (
+                            main_table.group(1) if main_table else None
+                        )
+                        if table not in models:
+                            continue
+                        rows = self.get_row_count(cursor, table)
+                        if rows < options['min_rows']:
+                            continue
+                        flagged += 1
+                        self.stdout.write(
+                            f'[{scenario}] {table} ({rows} rows): {detail}\n'
+                            f'    {sql[:300]}'
+                        )
+                        suggestion = self.suggest(
+                            cursor, models[table], table, alias, statement
+                        )
+                        if suggestion:
+                            suggestions[models[table]].add(suggestion)
+            transaction.set_rollback(True)
+        self.stdout.write(
+            f'{len(statements)} statements explained, {flagged} scans or '
+            'sorts over large tables.'
+        )
+        if not suggestions:
+            self.stdout.write(self.style.SUCCESS('No indexes to suggest.'))
+            return
+        self.stdout.write(self.style.WARNING('Suggested Meta.indexes:'))
+        for model, items in sorted(
+            suggestions.items(), key=lambda item: item[0]._meta.label
+        ):
+            self.stdout.write(f'{model._meta.label}:')
+            for suggestion in sorted(items):
+                self.stdout.write(f'    {suggestion},')
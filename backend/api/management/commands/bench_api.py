@@ -0,0 +1,169 @@
+import json
+import re
+import time
+import urllib.error
+import urllib.request
+from contextlib import ExitStack
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+from django.db.models import Count
+from django.test import Client
+from rest_framework.authtoken.models import Token
+
+from api.metrics import QueryTimer
+from recipes.models import Ingredient, Recipe, ShoppingCart, Tag
+from users.models import Subscribe
+
+SERVER_TIMING_QUERIES = re.compile(r'desc="(\d+) queries"')
+
+
+def percentile(values, percent):
+    ordered = sorted(values)
+    index = max(0, int(round(percent / 100 * len(ordered))) - 1)
+    return ordered[index]
+
+
+class Command(BaseCommand):
+    help = 'Benchmark the hot API endpoints and report latency as JSON.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--requests', type=int, default=200,
+            help='Measured requests per scenario.'
+        )
+        parser.add_argument(
+            '--warmup', type=int, default=10,
+            help='Unmeasured requests per scenario.'
+        )
+        parser.add_argument(
+            '--scenario', nargs='+',
+            help='Only run the given scenarios.'
+        )
+        parser.add_argument(
+            '--base-url',
+            help='Benchmark a running server (e.g. http://127.0.0.1:8000) '
+                 'instead of the in-process test client.'
+        )
+        parser.add_argument('--output', help='Write the JSON report here.')
+
+    def get_scenarios(self):
+        recipe = Recipe.objects.order_by('-id').first()
+        if recipe is None:
+            raise CommandError('No recipes, run generate_data first.')
+        tags = list(Tag.objects.values_list('slug', flat=True)[:2])
+        ingredient = Ingredient.objects.order_by('id').first()
+        return {
+            'recipe-list': '/api/recipes/?limit=6',
+            'recipe-list-deep': '/api/recipes/?limit=6&page=50',
+            'recipe-list-tags': '/api/recipes/?limit=6&' + '&'.join(
+                f'tags={slug}' for slug in tags
+            ),
+            'recipe-list-author': (
+                f'/api/recipes/?limit=6&author={recipe.author_id}'
+            ),
+            'recipe-detail': f'/api/recipes/{recipe.id}/',
+            'ingredient-search': (
+                f'/api/ingredients/?name={ingredient.name[:2]}'
+            ),
+            'subscriptions': '/api/users/subscriptions/?recipes_limit=3',
+            'download-shopping-cart': '/api/recipes/download_shopping_cart/',
+        }
+
+    @staticmethod
+    def get_token():
+        user_id = Subscribe.objects.values('user').annotate(
+            total=Count('id')
+        ).order_by('-total').values_list('user', flat=True).first()
+        if user_id is None:
+            user_id = ShoppingCart.objects.values_list(
+                'user', flat=True
+            ).first()
+        if user_id is None:
+            raise CommandError('No subscriptions or carts to benchmark.')
+        token, _ = Token.objects.get_or_create(user_id=user_id)
+        return token.key
+
+    def request_local(self, url):
+        timer = QueryTimer()
+        with ExitStack() as stack:
+            for alias in connections:
+                stack.enter_context(
+                    connections[alias].execute_wrapper(timer)
+                )
+            response = self.client.get(url, **self.headers)
+            if response.streaming:
+                b''.join(response.streaming_content)
+        return response.status_code, timer.count
+
+    def request_remote(self, url):
+        request = urllib.request.Request(
+            self.base_url + url,
+            headers={'Authorization': self.headers['HTTP_AUTHORIZATION']}
+        )
+        try:
+            with urllib.request.urlopen(request) as response:
+                response.read()
+                status, timing = response.status, response.headers.get(
+                    'Server-Timing', ''
+                )
+        except urllib.error.HTTPError as error:
+            status, timing = error.code, ''
+        match = SERVER_TIMING_QUERIES.search(timing)
+        return status, int(match.group(1)) if match else None
+
+    def run_scenario(self, url, options):
+        request = self.request_remote if self.base_url else self.request_local
+        for _ in range(options['warmup']):
+            request(url)
+        latencies, queries, statuses = [], [], set()
+        start = time.perf_counter()
+        for _ in range(options['requests']):
+            request_start = time.perf_counter()
+            status, query_count = request(url)
+            latencies.append(time.perf_counter() - request_start)
+            statuses.add(status)
+            if query_count is not None:
+                queries.append(query_count)
+        elapsed = time.perf_counter() - start
+        return {
+            'url': url,
+            'status': sorted(statuses),
+            'p50_ms': round(percentile(latencies, 50) * 1000, 2),
+            'p95_ms': round(percentile(latencies, 95) * 1000, 2),
+            'p99_ms': round(percentile(latencies, 99) * 1000, 2),
+            'rps': round(len(latencies) / elapsed, 1),
+            'queries_per_request': (
+                round(sum(queries) / len(queries), 2) if queries else None
+            ),
+        }
+
+    def handle(self, *args, **options):
+        if options['requests'] < 1:
+            raise CommandError('--requests must be positive.')
+        self.base_url = (options['base_url'] or '').rstrip('/')
+        self.client = Client()
+        self.headers = {'HTTP_AUTHORIZATION': f'Token {self.get_token()}'}
+        scenarios = self.get_scenarios()
+        if options['scenario']:
+            unknown = set(options['scenario']) - set(scenarios)
+            if unknown:
+                raise CommandError(f'Unknown scenarios: {sorted(unknown)}')
+            scenarios = {
+                name: url for name, url in scenarios.items()
+                if name in options['scenario']
+            }
+        report = {
+            'database': connection.vendor,
+            'target': self.base_url or 'test-client',
+            'recipes': Recipe.objects.count(),
+            'scenarios': {
+                name: self.run_scenario(url, options)
+                for name, url in scenarios.items()
+            },
+        }
+        output = json.dumps(report, indent=2, ensure_ascii=False)
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as file:
+                file.write(output)
+        self.stdout.write(output)
@@ -0,0 +1,67 @@
+import json
+import time
+import tracemalloc
+
+from django.core.management.base import BaseCommand
+
+from api.utils import pdf_create, register_font
+
+
+class Command(BaseCommand):
+    help = 'Benchmark shopping list PDF rendering for carts of given sizes.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sizes', type=int, nargs='+', default=[10, 1000, 10000],
+            help='Numbers of aggregated ingredient lines.'
+        )
+        parser.add_argument(
+            '--repeat', type=int, default=3,
+            help='Runs per size; the best latency is reported.'
+        )
+
+    @staticmethod
+    def make_ingredients(size):
+        return [
+            {
+                'ingredient__name': f'Ингредиент номер {i}',
+                'ingredient__measurement_unit': 'г',
+                'total_ingredients': i * 10,
+            }
+            for i in range(size)
+        ]
+
+    @staticmethod
+    def render(ingredients):
+        response = pdf_create(ingredients)
+        return sum(len(chunk) for chunk in response.streaming_content)
+
+    def measure_latency(self, ingredients):
+        start = time.perf_counter()
+        self.render(ingredients)
+        return time.perf_counter() - start
+
+    def measure_peak_memory(self, ingredients):
+        tracemalloc.start()
+        pdf_size = self.render(ingredients)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        return peak, pdf_size
+
+    def handle(self, *args, **options):
+        register_font()
+        results = []
+        for size in options['sizes']:
+            ingredients = self.make_ingredients(size)
+            latency = min(
+                self.measure_latency(ingredients)
+                for _ in range(options['repeat'])
+            )
+            peak, pdf_size = self.measure_peak_memory(ingredients)
+            results.append({
+                'lines': size,
+                'latency_ms': round(latency * 1000, 2),
+                'peak_memory_kb': round(peak / 1024),
+                'pdf_size_kb': round(pdf_size / 1024),
+            })
+        self.stdout.write(json.dumps(results, indent=2))
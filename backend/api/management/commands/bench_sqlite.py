@@ -0,0 +1,166 @@
+import json
+import logging
+import multiprocessing
+import random
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+from django.test import Client
+from django.test.utils import override_settings
+from rest_framework.authtoken.models import Token
+
+from .bench_api import percentile
+from recipes.models import Recipe
+from users.models import User
+
+# The connection as it was before SQLITE_PRAGMAS: SQLite's defaults and
+# the 5 s busy timeout of Python's sqlite3.connect. The journal mode is
+# kept in the database file, so it has to be set back explicitly.
+DEFAULT_PRAGMAS = {
+    'journal_mode': 'delete',
+}
+
+
+class Command(BaseCommand):
+    help = ('Run favorite/cart writes against recipe list reads in '
+            'parallel processes with default and tuned SQLite settings and '
+            'report throughput as JSON.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--readers', type=int, default=4)
+        parser.add_argument('--writers', type=int, default=4)
+        parser.add_argument(
+            '--duration', type=float, default=10,
+            help='Seconds per mode.'
+        )
+        parser.add_argument(
+            '--mode', choices=('default', 'tuned'), nargs='+',
+            default=['default', 'tuned']
+        )
+        parser.add_argument('--output', help='Write the JSON report here.')
+
+    def get_headers(self, count):
+        user_ids = list(User.objects.order_by('id').values_list(
+            'id', flat=True
+        )[:count])
+        if len(user_ids) < count:
+            raise CommandError(f'Need {count} users, run generate_data.')
+        return [
+            {'HTTP_AUTHORIZATION': 'Token {}'.format(
+                Token.objects.get_or_create(user_id=user_id)[0].key
+            )}
+            for user_id in user_ids
+        ]
+
+    def read(self, headers):
+        client = Client()
+        pages = max(1, self.recipe_count // 6)
+        url = f'/api/recipes/?page={random.randint(1, min(pages, 50))}'
+        return client.get(url, **headers)
+
+    def write(self, headers):
+        client = Client()
+        recipe_id = random.choice(self.recipe_ids)
+        path = random.choice(('favorite', 'shopping_cart'))
+        url = f'/api/recipes/{recipe_id}/{path}/'
+        if random.random() < 0.5:
+            return client.post(url, **headers)
+        return client.delete(url, **headers)
+
+    def worker(self, action, headers, deadline, results):
+        # Runs in a forked process: its own interpreter and its own
+        # connection, so workers only contend on the database locks.
+        random.seed()
+        latencies, errors = [], 0
+        try:
+            while time.monotonic() < deadline:
+                start = time.perf_counter()
+                try:
+                    response = action(headers)
+                    failed = response.status_code >= 500
+                except Exception:
+                    failed = True
+                if failed:
+                    errors += 1
+                else:
+                    latencies.append(time.perf_counter() - start)
+        finally:
+            connection.close()
+            results.put({'latencies': latencies, 'errors': errors})
+
+    def run_mode(self, mode, options):
+        pragmas = DEFAULT_PRAGMAS if mode == 'default' else None
+        overrides = {'SQLITE_PRAGMAS': pragmas} if pragmas else {}
+        context = multiprocessing.get_context('fork')
+        with override_settings(**overrides):
+            # The journal mode is stored in the file, set it before the run.
+            connections.close_all()
+            with connection.cursor():
+                pass
+            # Forked children must not share the parent's connection.
+            connections.close_all()
+            deadline = time.monotonic() + options['duration']
+            processes = []
+            for kind, count in (
+                ('read', options['readers']), ('write', options['writers'])
+            ):
+                action = self.read if kind == 'read' else self.write
+                for index in range(count):
+                    queue = context.SimpleQueue()
+                    processes.append((kind, queue, context.Process(
+                        target=self.worker,
+                        args=(action, self.headers[index], deadline, queue)
+                    )))
+            for _, _, process in processes:
+                process.start()
+            results = {'read': [], 'write': []}
+            for kind, queue, process in processes:
+                results[kind].append(queue.get())
+                process.join()
+        report = {}
+        for kind, stats in results.items():
+            latencies = [
+                value for item in stats for value in item['latencies']
+            ]
+            report[kind] = {
+                'ops_per_s': round(len(latencies) / options['duration'], 1),
+                'p95_ms': (
+                    round(percentile(latencies, 95) * 1000, 2)
+                    if latencies else None
+                ),
+                'errors': sum(item['errors'] for item in stats),
+            }
+        return report
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite':
+            raise CommandError('This benchmark is for SQLite databases.')
+        self.recipe_ids = list(Recipe.objects.values_list('id', flat=True))
+        if not self.recipe_ids:
+            raise CommandError('No recipes, run generate_data first.')
+        self.recipe_count = len(self.recipe_ids)
+        self.headers = self.get_headers(
+            max(options['readers'], options['writers'])
+        )
+        # Lock errors are counted, not logged with a traceback each.
+        request_logger = logging.getLogger('django.request')
+        level = request_logger.level
+        request_logger.setLevel(logging.CRITICAL)
+        try:
+            modes = {
+                mode: self.run_mode(mode, options) for mode in options['mode']
+            }
+        finally:
+            request_logger.setLevel(level)
+        report = {
+            'readers': options['readers'],
+            'writers': options['writers'],
+            'duration_s': options['duration'],
+            'modes': modes,
+        }
+        output = json.dumps(report, indent=2)
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as file:
+                file.write(output)
+        self.stdout.write(output)
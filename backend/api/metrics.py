@@ -0,0 +1,182 @@
+import sqlite3
+import threading
+import time
+from collections import defaultdict
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+
+class QueryTimer:
+    # Execute wrapper counting the queries of a request and their time.
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - start
+            self.count += 1
+
+
+class MetricsRegistry:
+    # Per-worker aggregation that is periodically added to a SQLite file
+    # shared by all workers of the host.
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pending = defaultdict(float)
+        self._flushed_at = time.monotonic()
+
+    def observe(self, route, duration, queries, db_duration, response_bytes):
+        values = {
+            'count': 1,
+            'duration': duration,
+            'queries': queries,
+            'db_duration': db_duration,
+            'response_bytes': response_bytes,
+        }
+        with self._lock:
+            for name, value in values.items():
+                self._pending[route, name] += value
+            for bucket in BUCKETS:
+                if duration <= bucket:
+                    self._pending[route, f'le_{bucket}'] += 1
+            if (time.monotonic() - self._flushed_at
+                    >= settings.METRICS_FLUSH_INTERVAL):
+                self._flush()
+
+    def _connect(self):
+        db = sqlite3.connect(settings.METRICS_STORE, timeout=5)
+        db.execute(
+            'CREATE TABLE IF NOT EXISTS metrics (route TEXT, name TEXT, '
+            'value REAL, PRIMARY KEY (route, name))'
+        )
+        return db
+
+    def _flush(self):
+        self._flushed_at = time.monotonic()
+        if not settings.METRICS_STORE or not self._pending:
+            return
+        try:
+            with self._connect() as db:
+                db.executemany(
+                    'INSERT INTO metrics (route, name, value) '
+                    'VALUES (?, ?, ?) ON CONFLICT (route, name) '
+                    'DO UPDATE SET value = value + excluded.value',
+                    [(route, name, value)
+                     for (route, name), value in self._pending.items()]
+                )
+        except sqlite3.Error:
+            return
+        self._pending.clear()
+
+    def collect(self):
+        with self._lock:
+            self._flush()
+            values = defaultdict(dict)
+            for (route, name), value in self._pending.items():
+                values[route][name] = value
+            if settings.METRICS_STORE:
+                try:
+                    with self._connect() as db:
+                        for route, name, value in db.execute(
+                            'SELECT route, name, value FROM metrics'
+                        ):
+                            values[route][name] = value
+                except sqlite3.Error:
+                    pass
+        return values
+
+    def render(self):
+        lines = []
+        metrics = self.collect()
+
+        def add(name, kind, help_text, samples):
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} {kind}')
+            lines.extend(samples)
+
+        histogram = []
+        for route, values in sorted(metrics.items()):
+            for bucket in BUCKETS:
+                histogram.append(
+                    f'foodgram_request_duration_seconds_bucket'
+                    f'{{route="{route}",le="{bucket}"}} '
+                    f'{values.get(f"le_{bucket}", 0):g}'
+                )
+            histogram.append(
+                f'foodgram_request_duration_seconds_bucket'
+                f'{{route="{route}",le="+Inf"}} {values.get("count", 0):g}'
+            )
+            histogram.append(
+                f'foodgram_request_duration_seconds_sum{{route="{route}"}} '
+                f'{values.get("duration", 0):g}'
+            )
+            histogram.append(
+                f'foodgram_request_duration_seconds_count{{route="{route}"}} '
+                f'{values.get("count", 0):g}'
+            )
+        add('foodgram_request_duration_seconds', 'histogram',
+            'Request latency by route.', histogram)
+        for name, key, help_text in (
+            ('foodgram_db_queries_total', 'queries',
+             'Database queries by route.'),
+            ('foodgram_db_duration_seconds_total', 'db_duration',
+             'Database time by route.'),
+            ('foodgram_response_bytes_total', 'response_bytes',
+             'Response body size by route.'),
+        ):
+            add(name, 'counter', help_text, [
+                f'{name}{{route="{route}"}} {values.get(key, 0):g}'
+                for route, values in sorted(metrics.items())
+            ])
+        return '\n'.join(lines) + '\n'
+
+
+registry = MetricsRegistry()
+
+
+class MetricsMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    @staticmethod
+    def get_route(request):
+        match = getattr(request, 'resolver_match', None)
+        if match is None or not match.url_name:
+            return 'unmatched'
+        return match.url_name
+
+    @staticmethod
+    def get_size(response):
+        if response.streaming:
+            return int(response.get('Content-Length', 0))
+        return len(response.content)
+
+    def __call__(self, request):
+        if not settings.METRICS_ENABLED:
+            return self.get_response(request)
+        timer = QueryTimer()
+        start = time.perf_counter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(timer))
+            response = self.get_response(request)
+        duration = time.perf_counter() - start
+        response['Server-Timing'] = (
+            f'app;dur={duration * 1000:.1f}, '
+            f'db;dur={timer.duration * 1000:.1f};desc="{timer.count} queries"'
+        )
+        registry.observe(
+            self.get_route(request), duration, timer.count, timer.duration,
+            self.get_size(response)
+        )
+        return response
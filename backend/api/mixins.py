@@ -0,0 +1,110 @@
+import hashlib
+
+from django.utils.http import parse_etags, urlencode
+from rest_framework import status
+from rest_framework.response import Response
+
+from recipes import response_cache, versions
+
+
+class ConditionalGetMixin:
+    # Answers list and retrieve with 304 Not Modified when the change
+    # versions the response depends on are the same as in If-None-Match.
+    etag_keys = ()
+
+    def get_etag_keys(self):
+        keys = list(self.etag_keys)
+        if self.request.user.is_authenticated:
+            keys.append(versions.user_key(self.request.user.id))
+        return keys
+
+    def get_etag_extra(self):
+        return None
+
+    def get_change_versions(self):
+        # Read once per request, also used by RecipePagination.
+        if not hasattr(self, '_change_versions'):
+            self._change_versions = versions.get_versions(
+                self.get_etag_keys()
+            )
+        return self._change_versions
+
+    def get_etag(self):
+        request = self.request
+        source = repr((
+            request.get_full_path(),
+            request.META.get('HTTP_ACCEPT'),
+            request.user.id,
+            sorted(self.get_change_versions().items()),
+            self.get_etag_extra(),
+        ))
+        return 'W/"{}"'.format(hashlib.md5(source.encode()).hexdigest())
+
+    @staticmethod
+    def etag_matches(etag, header):
+        if not header:
+            return False
+        if header.strip() == '*':
+            return True
+        opaque = etag[2:]
+        return any(
+            tag == etag or tag.replace('W/', '', 1) == opaque
+            for tag in parse_etags(header)
+        )
+
+    def conditional(self, handler, request, *args, **kwargs):
+        etag = self.get_etag()
+        if self.etag_matches(etag, request.META.get('HTTP_IF_NONE_MATCH')):
+            return Response(
+                status=status.HTTP_304_NOT_MODIFIED, headers={'ETag': etag}
+            )
+        response = handler(request, *args, **kwargs)
+        if response.status_code == status.HTTP_200_OK:
+            response['ETag'] = etag
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional(super().retrieve, request, *args, **kwargs)
+
+
+class AnonymousCacheMixin:
+    # Anonymous list and retrieve responses are the same for every visitor,
+    # so their data is cached until a write to the recipes invalidates it.
+
+    def get_cache_key(self):
+        request = self.request
+        if request.user.is_authenticated:
+            return None
+        if self.action == 'retrieve':
+            lookup = self.lookup_url_kwarg or self.lookup_field
+            pk = str(self.kwargs.get(lookup))
+            if request.query_params or not pk.isdigit():
+                return None
+            return response_cache.detail_key(int(pk))
+        query = urlencode(sorted(
+            (name, value) for name, values in request.query_params.lists()
+            for value in values
+        ))
+        return response_cache.list_key(request.path, query)
+
+    def cached(self, handler, request, *args, **kwargs):
+        key = self.get_cache_key()
+        if key is None:
+            return handler(request, *args, **kwargs)
+        base_uri = request.build_absolute_uri('/')
+        data = response_cache.get(key, base_uri)
+        if data is not None:
+            return Response(data)
+        response = handler(request, *args, **kwargs)
+        if response.status_code == status.HTTP_200_OK:
+            response_cache.store(key, base_uri, response.data)
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.cached(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached(super().retrieve, request, *args, **kwargs)
@@ -1,6 +1,67 @@
-from rest_framework.pagination import PageNumberPagination
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import EmptyResultSet
+from django.core.paginator import Paginator
+from django.utils.functional import cached_property
+from rest_framework.pagination import CursorPagination, PageNumberPagination
 
 
 class CustomPagination(PageNumberPagination):
     page_size = 6
     page_size_query_param = 'limit'
+
+
+class CachedCountPaginator(Paginator):
+    # The total is shared between requests with the same filtered query for
+    # PAGINATION_COUNT_TIMEOUT seconds instead of running COUNT(*) per page.
+    # The page is sliced with it, so the key includes the change versions
+    # the query depends on: any write that can change the total makes a
+    # new key.
+
+    def __init__(self, object_list, per_page, change_versions=None,
+                 **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self.change_versions = change_versions or {}
+
+    @cached_property
+    def count(self):
+        try:
+            sql, params = self.object_list.query.sql_with_params()
+        except EmptyResultSet:
+            return 0
+        key = 'recipes-count:' + hashlib.md5(repr((
+            sql, params, sorted(self.change_versions.items())
+        )).encode()).hexdigest()
+        count = cache.get(key)
+        if count is None:
+            count = self.object_list.count()
+            cache.set(key, count, settings.PAGINATION_COUNT_TIMEOUT)
+        return count
+
+
+class RecipePagination(CustomPagination):
+    change_versions = None
+
+    def django_paginator_class(self, queryset, page_size):
+        return CachedCountPaginator(
+            queryset, page_size, change_versions=self.change_versions
+        )
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if hasattr(view, 'get_change_versions'):
+            self.change_versions = view.get_change_versions()
+        return super().paginate_queryset(queryset, request, view)
+
+
+class RecipeCursorPagination(CursorPagination):
+    page_size = 6
+    page_size_query_param = 'limit'
+    ordering = ('-pub_date', '-id')
+
+
+class FeedPagination(CursorPagination):
+    page_size = 6
+    page_size_query_param = 'limit'
+    ordering = ('-pub_date', '-id')
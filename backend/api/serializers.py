@@ -1,9 +1,17 @@
-from drf_extra_fields.fields import Base64ImageField
+import json
+from collections import Counter, OrderedDict
+
+from django.db import transaction
 from rest_framework import serializers
+from rest_framework.exceptions import NotFound
 
+from recipes import shopping_list, tasks
+from recipes.cards import ensure_cards
+from recipes.images import HashedBase64ImageField, create_variants
 from recipes.models import (Favorite, Ingredient, IngredientRecipe, Recipe,
-                            ShoppingCart, Tag)
+                            ShoppingCart, Tag, TagRecipe)
 from users.serializers import RecipeSubscribeSerializer, UserSerializer
+from users.utils import get_subscribed_ids
 
 
 class TagSerializer(serializers.ModelSerializer):
@@ -18,18 +26,6 @@ class IngredientsSerializer(serializers.ModelSerializer):
         fields = ('id', 'name', 'measurement_unit')
 
 
-class AmountIngredientsSerializer(serializers.ModelSerializer):
-    id = serializers.IntegerField(source='ingredient.id')
-    name = serializers.ReadOnlyField(source='ingredient.name')
-    measurement_unit = serializers.ReadOnlyField(
-        source='ingredient.measurement_unit'
-    )
-
-    class Meta:
-        model = IngredientRecipe
-        fields = ('id', 'name', 'measurement_unit', 'amount')
-
-
 class AddAmountIngredientsSerializer(serializers.ModelSerializer):
     id = serializers.IntegerField(source='ingredient.id')
 
@@ -38,24 +34,60 @@ class AddAmountIngredientsSerializer(serializers.ModelSerializer):
         fields = ('id', 'amount')
 
 
-class RecipeListSerializer(serializers.ModelSerializer):
-    tags = TagSerializer(many=True, read_only=True)
-    author = UserSerializer(read_only=True)
-    ingredients = AmountIngredientsSerializer(
-        source='ingredient_recipes', many=True
-    )
-    is_favorited = serializers.SerializerMethodField()
-    is_in_shopping_cart = serializers.SerializerMethodField()
+class RecipeCardListSerializer(serializers.ListSerializer):
+    def to_representation(self, data):
+        recipes = list(data.all() if hasattr(data, 'all') else data)
+        return super().to_representation(ensure_cards(recipes))
+
+
+class RecipeListSerializer(serializers.BaseSerializer):
+    # Read only. The shared part comes from the recipe card, only the
+    # per-user flags are added per request.
 
     class Meta:
-        model = Recipe
-        fields = ('id', 'tags', 'author', 'ingredients', 'is_favorited',
-                  'is_in_shopping_cart', 'name', 'image', 'text',
-                  'cooking_time')
+        list_serializer_class = RecipeCardListSerializer
+
+    def to_representation(self, instance):
+        if not ensure_cards([instance]):
+            raise NotFound()
+        card = json.loads(instance.card.data)
+        request = self.context['request']
+        user = request.user
+        author = card['author']
+        author['is_subscribed'] = (
+            user.is_authenticated
+            and author['id'] in get_subscribed_ids(request)
+        )
+        variants = card['image_variants']
+        if variants is not None:
+            variants = {
+                label: {
+                    extension: request.build_absolute_uri(url)
+                    for extension, url in urls.items()
+                }
+                for label, urls in variants.items()
+            }
+        return OrderedDict((
+            ('id', card['id']),
+            ('tags', card['tags']),
+            ('author', author),
+            ('ingredients', card['ingredients']),
+            ('is_favorited', self.get_is_favorited(instance)),
+            ('is_in_shopping_cart', self.get_is_in_shopping_cart(instance)),
+            ('name', card['name']),
+            ('image', card['image'] and request.build_absolute_uri(
+                card['image']
+            )),
+            ('image_variants', variants),
+            ('text', card['text']),
+            ('cooking_time', card['cooking_time']),
+        ))
 
     def get_is_favorited(self, obj):
         user = self.context['request'].user
         if not user.is_anonymous:
+            if hasattr(obj, 'is_favorited'):
+                return obj.is_favorited
             return Favorite.objects.filter(
                 user=user, recipe__id=obj.id
             ).exists()
@@ -63,6 +95,8 @@ class RecipeListSerializer(serializers.ModelSerializer):
     def get_is_in_shopping_cart(self, obj):
         user = self.context['request'].user
         if not user.is_anonymous:
+            if hasattr(obj, 'is_in_shopping_cart'):
+                return obj.is_in_shopping_cart
             return ShoppingCart.objects.filter(
                 user=user, recipe__id=obj.id
             ).exists()
@@ -72,10 +106,8 @@ class CreateRecipeSerializer(serializers.ModelSerializer):
     ingredients = AddAmountIngredientsSerializer(
         source='ingredient_recipes', many=True
     )
-    tags = serializers.PrimaryKeyRelatedField(
-        queryset=Tag.objects.all(), many=True
-    )
-    image = Base64ImageField(max_length=None, use_url=False)
+    tags = serializers.ListField(child=serializers.IntegerField())
+    image = HashedBase64ImageField(max_length=None, use_url=False)
     author = UserSerializer(read_only=True)
 
     class Meta:
@@ -83,49 +115,75 @@ class CreateRecipeSerializer(serializers.ModelSerializer):
         fields = ('id', 'tags', 'author', 'ingredients', 'name', 'image',
                   'text', 'cooking_time')
 
+    @staticmethod
+    def format_ids(ids):
+        return ', '.join(str(pk) for pk in sorted(ids))
+
     def validate(self, attrs):
-        if not attrs['ingredient_recipes']:
-            raise serializers.ValidationError(
-                'В рецепте не могут отсутствовать ингредиенты!'
+        errors = []
+        if 'ingredient_recipes' in attrs:
+            errors.extend(self.validate_ingredient_rows(
+                attrs['ingredient_recipes']
+            ))
+        if 'tags' in attrs:
+            errors.extend(self.validate_tag_ids(attrs['tags']))
+        if 'cooking_time' in attrs and int(attrs['cooking_time']) <= 0:
+            errors.append('Время готовки должно быть больше 0!')
+        if errors:
+            raise serializers.ValidationError(errors)
+        return attrs
+
+    def validate_ingredient_rows(self, ingredients):
+        if not ingredients:
+            return ['В рецепте не могут отсутствовать ингредиенты!']
+        errors = []
+        ingredient_ids = [
+            ingredient['ingredient']['id'] for ingredient in ingredients
+        ]
+        repeated = {
+            pk for pk, count in Counter(ingredient_ids).items() if count > 1
+        }
+        if repeated:
+            errors.append(
+                'В рецепте не может быть повторяющихся ингредиентов: '
+                f'{self.format_ids(repeated)}!'
             )
-        print(attrs['ingredient_recipes'])
-
-        ingredients_list = []
-        for ingredient in attrs['ingredient_recipes']:
-            print(ingredient['ingredient']['id'])
-            ingredient_id = ingredient['ingredient']['id']
-            some_ingredient = Ingredient.objects.filter(id=ingredient_id)
-            if ingredient_id in ingredients_list:
-                raise serializers.ValidationError(
-                    'В рецепте не может быть повторяющихся ингредиентов!'
-                )
-            if not some_ingredient.exists():
-                raise serializers.ValidationError(
-                    'Такого инредиенты нет в списке доступных!'
-                )
-            if int(ingredient['amount']) <= 0:
-                raise serializers.ValidationError(
-                    'Количество ингредиентов должно быть больше нуля!'
-                )
-            ingredients_list.append(ingredient_id)
-
-        tags_list = []
-        if not attrs['tags']:
-            raise serializers.ValidationError(
-                'Рецепт должен иметь не меньше одного тега!'
+        missing = set(ingredient_ids) - set(Ingredient.objects.filter(
+            id__in=ingredient_ids
+        ).values_list('id', flat=True))
+        if missing:
+            errors.append(
+                'Таких ингредиентов нет в списке доступных: '
+                f'{self.format_ids(missing)}!'
             )
-        for tag in attrs['tags']:
-            if tag in tags_list:
-                raise serializers.ValidationError(
-                    'Тэг не может повторяться!'
-                )
-            tags_list.append(tag)
-
-        if int(attrs['cooking_time']) <= 0:
-            raise serializers.ValidationError(
-                'Время готовки должно быть больше 0!'
+        non_positive = {
+            ingredient['ingredient']['id'] for ingredient in ingredients
+            if int(ingredient['amount']) <= 0
+        }
+        if non_positive:
+            errors.append(
+                'Количество ингредиентов должно быть больше нуля: '
+                f'{self.format_ids(non_positive)}!'
             )
-        return attrs
+        return errors
+
+    def validate_tag_ids(self, tags):
+        if not tags:
+            return ['Рецепт должен иметь не меньше одного тега!']
+        errors = []
+        repeated = {pk for pk, count in Counter(tags).items() if count > 1}
+        if repeated:
+            errors.append(
+                f'Тэг не может повторяться: {self.format_ids(repeated)}!'
+            )
+        missing = set(tags) - set(Tag.objects.filter(
+            id__in=tags
+        ).values_list('id', flat=True))
+        if missing:
+            errors.append(
+                f'Таких тегов не существует: {self.format_ids(missing)}!'
+            )
+        return errors
 
     @staticmethod
     def add_ingredient(ingredients, recipe):
@@ -139,24 +197,78 @@ class CreateRecipeSerializer(serializers.ModelSerializer):
 
     @staticmethod
     def add_tags(tags, recipe):
-        recipe.tags.set(tags, clear=True)
+        TagRecipe.objects.bulk_create(
+            [TagRecipe(recipe=recipe, tag_id=tag) for tag in tags]
+        )
+
+    @staticmethod
+    def update_ingredients(ingredients, recipe):
+        current = {
+            row.ingredient_id: row
+            for row in IngredientRecipe.objects.filter(recipe=recipe)
+        }
+        submitted = {
+            ingredient['ingredient']['id']: ingredient['amount']
+            for ingredient in ingredients
+        }
+        # Deleting sends signals that update carts, bulk writes do not.
+        IngredientRecipe.objects.filter(
+            recipe=recipe, ingredient_id__in=set(current) - set(submitted)
+        ).delete()
+        changes = {}
+        changed_rows = []
+        for ingredient_id, amount in submitted.items():
+            row = current.get(ingredient_id)
+            if row is not None and row.amount != amount:
+                changes[ingredient_id] = amount - row.amount
+                row.amount = amount
+                changed_rows.append(row)
+        IngredientRecipe.objects.bulk_update(changed_rows, ['amount'])
+        new_rows = [
+            IngredientRecipe(
+                recipe=recipe, ingredient_id=ingredient_id, amount=amount
+            )
+            for ingredient_id, amount in submitted.items()
+            if ingredient_id not in current
+        ]
+        IngredientRecipe.objects.bulk_create(new_rows)
+        changes.update({row.ingredient_id: row.amount for row in new_rows})
+        shopping_list.ingredients_changed(recipe.id, changes)
 
+    @staticmethod
+    def update_tags(tags, recipe):
+        current = set(TagRecipe.objects.filter(
+            recipe=recipe
+        ).values_list('tag_id', flat=True))
+        TagRecipe.objects.filter(
+            recipe=recipe, tag_id__in=current - set(tags)
+        ).delete()
+        TagRecipe.objects.bulk_create(
+            [TagRecipe(recipe=recipe, tag_id=tag)
+             for tag in set(tags) - current]
+        )
+
+    @transaction.atomic
     def create(self, validated_data):
         tags = validated_data.pop('tags')
         ingredients = validated_data.pop('ingredient_recipes')
         recipe = Recipe.objects.create(**validated_data)
         self.add_tags(tags, recipe)
         self.add_ingredient(ingredients, recipe)
+        tasks.submit(create_variants, recipe.id)
         return recipe
 
+    @transaction.atomic
     def update(self, instance, validated_data):
-        tags = validated_data.pop('tags')
-        ingredients = validated_data.pop('ingredient_recipes')
-        IngredientRecipe.objects.filter(recipe=instance).delete()
-        self.add_tags(tags, instance)
-        self.add_ingredient(ingredients, instance)
-        super().update(instance, validated_data)
-        instance.save()
+        tags = validated_data.pop('tags', None)
+        ingredients = validated_data.pop('ingredient_recipes', None)
+        if tags is not None:
+            self.update_tags(tags, instance)
+        if ingredients is not None:
+            self.update_ingredients(ingredients, instance)
+        instance = super().update(instance, validated_data)
+        if instance.variants_source != instance.image.name:
+            tasks.submit(create_variants, instance.id)
         return instance
 
     def to_representation(self, instance):
@@ -165,6 +277,25 @@ class CreateRecipeSerializer(serializers.ModelSerializer):
         return RecipeListSerializer(instance, context=context).data
 
 
+class RecipeIdsSerializer(serializers.Serializer):
+    recipes = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False, max_length=100
+    )
+
+    def validate_recipes(self, value):
+        recipe_ids = set(value)
+        missing = recipe_ids - set(Recipe.objects.filter(
+            id__in=recipe_ids
+        ).values_list('id', flat=True))
+        if missing:
+            raise serializers.ValidationError(
+                'Таких рецептов не существует: '
+                f'{CreateRecipeSerializer.format_ids(missing)}!'
+            )
+        return recipe_ids
+
+
 class FavoriteSerializer(serializers.ModelSerializer):
     class Meta:
         model = Favorite
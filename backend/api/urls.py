@@ -1,8 +1,8 @@
 from django.urls import include, path
 from rest_framework.routers import DefaultRouter
 
-from .views import (FavoriteViewSet, IngredientViewSet, RecipeViewSet,
-                    ShoppingCartViewSet, TagViewSet)
+from .views import (FavoriteViewSet, IngredientViewSet, MetricsView,
+                    RecipeViewSet, ShoppingCartViewSet, TagViewSet)
 
 app_name = 'api'
 
@@ -12,9 +12,14 @@ router.register('tags', TagViewSet, basename='tags')
 router.register('ingredients', IngredientViewSet, basename='ingredients')
 
 urlpatterns = [
+    path('recipes/favorite/', FavoriteViewSet.as_view(
+        {'post': 'bulk_add', 'delete': 'bulk_remove'}), name='favorites'),
+    path('recipes/shopping_cart/', ShoppingCartViewSet.as_view(
+        {'post': 'bulk_add', 'delete': 'bulk_remove'}), name='carts'),
     path('recipes/<recipes_id>/favorite/', FavoriteViewSet.as_view(
         {'post': 'create', 'delete': 'delete'}), name='favorite'),
     path('recipes/<recipes_id>/shopping_cart/', ShoppingCartViewSet.as_view(
         {'post': 'create', 'delete': 'delete'}), name='cart'),
+    path('metrics/', MetricsView.as_view(), name='metrics'),
     path('', include(router.urls)),
 ]
@@ -1,31 +1,94 @@
-from django.http import HttpResponse
+import os
+import tempfile
+import threading
+
+from django.conf import settings
+from django.http import StreamingHttpResponse
 from reportlab.lib.pagesizes import A4
+from reportlab.lib.utils import simpleSplit
 from reportlab.pdfbase import pdfmetrics
 from reportlab.pdfbase.ttfonts import TTFont
 from reportlab.pdfgen import canvas
 
+FONT_NAME = 'TNR'
+FONT_PATH = os.path.join(settings.BASE_DIR, 'times.ttf')
+TITLE_SIZE = 24
+LINE_SIZE = 16
+LINE_HEIGHT = 25
+MARGIN_LEFT = 75
+MARGIN_RIGHT = 50
+MARGIN_TOP = 800
+MARGIN_BOTTOM = 50
+CHUNK_SIZE = 64 * 1024
+SPOOL_SIZE = 1024 * 1024
+
+_font_lock = threading.Lock()
+_font_registered = False
+
+
+def register_font():
+    global _font_registered
+    if _font_registered:
+        return
+    with _font_lock:
+        if not _font_registered:
+            pdfmetrics.registerFont(TTFont(FONT_NAME, FONT_PATH))
+            _font_registered = True
+
+
+def render_shopping_list(ingredients, output):
+    register_font()
+    width, _ = A4
+    max_width = width - MARGIN_LEFT - MARGIN_RIGHT
+    page = canvas.Canvas(output, pagesize=A4)
+    page.setTitle('Список покупок')
+    page.setFont(FONT_NAME, size=TITLE_SIZE)
+    page.drawString(200, MARGIN_TOP, 'Список покупок')
+    page.setFont(FONT_NAME, size=LINE_SIZE)
+    height = MARGIN_TOP - 50
+    for i, j in enumerate(ingredients, 1):
+        line = (
+            f'{i}) {j["ingredient__name"]} - '
+            f'{j["total_ingredients"]}'
+            f'{j["ingredient__measurement_unit"]}'
+        )
+        parts = [line]
+        if pdfmetrics.stringWidth(line, FONT_NAME, LINE_SIZE) > max_width:
+            parts = simpleSplit(line, FONT_NAME, LINE_SIZE, max_width)
+        for part in parts:
+            if height < MARGIN_BOTTOM:
+                page.showPage()
+                page.setFont(FONT_NAME, size=LINE_SIZE)
+                height = MARGIN_TOP
+            page.drawString(MARGIN_LEFT, height, part)
+            height -= LINE_HEIGHT
+    page.showPage()
+    page.save()
+
+
+def iter_file(file, chunk_size=CHUNK_SIZE):
+    try:
+        file.seek(0)
+        while True:
+            chunk = file.read(chunk_size)
+            if not chunk:
+                break
+            yield chunk
+    finally:
+        file.close()
+
 
 def pdf_create(ingredients):
-    pdfmetrics.registerFont(
-        TTFont('TNR', 'times.ttf', 'UTF-8')
+    # Large documents spill to a temporary file instead of staying in memory
+    # and are sent to the client in chunks.
+    output = tempfile.SpooledTemporaryFile(max_size=SPOOL_SIZE)
+    render_shopping_list(ingredients, output)
+    size = output.tell()
+    response = StreamingHttpResponse(
+        iter_file(output), content_type='application/pdf'
     )
-    response = HttpResponse(content_type='application/pdf')
+    response['Content-Length'] = size
     response['Content-Disposition'] = (
         'attachment; filename="shopping_list.pdf"'
     )
-    page = canvas.Canvas(response, pagesize=A4)
-    page.setFont('TNR', size=24)
-    page.setTitle('Список покупок')
-    page.drawString(200, 800, 'Список покупок')
-    page.setFont('TNR', size=16)
-    height = 750
-    for i, j in enumerate(ingredients, 1):
-        page.drawString(75, height, (
-            f'{i}) {j ["ingredient__name"]} - '
-            f'{j ["total_ingredients"]}'
-            f'{j ["ingredient__measurement_unit"]}'
-        ))
-        height -= 25
-    page.showPage()
-    page.save()
     return response
@@ -1,19 +1,31 @@
-from django.db.models import Sum
+from django.db import transaction
+from django.db.models import Exists, F, OuterRef
+from django.http import HttpResponse
 from django.shortcuts import get_object_or_404
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import status, viewsets
 from rest_framework.decorators import action
-from rest_framework.permissions import AllowAny, IsAuthenticated
+from rest_framework.permissions import (SAFE_METHODS, AllowAny,
+                                        IsAdminUser, IsAuthenticated)
 from rest_framework.response import Response
+from rest_framework.views import APIView
 
-from .filters import IngredientSearchFilter, RecipeFilter
+from .filters import RecipeFilter
+from .metrics import registry
+from .mixins import AnonymousCacheMixin, ConditionalGetMixin
+from .pagination import (FeedPagination, RecipeCursorPagination,
+                         RecipePagination)
 from .permissions import IsAuthorOrReadOnly
 from .serializers import (CreateRecipeSerializer, FavoriteSerializer,
-                          IngredientsSerializer, RecipeListSerializer,
-                          ShoppingCartSerializer, TagSerializer)
+                          IngredientsSerializer, RecipeIdsSerializer,
+                          RecipeListSerializer, ShoppingCartSerializer,
+                          TagSerializer)
 from .utils import pdf_create
-from recipes.models import (Favorite, Ingredient, IngredientRecipe, Recipe,
-                            ShoppingCart, Tag)
+from recipes import relations, versions
+from recipes.models import (Favorite, FeedEntry, Ingredient, Recipe,
+                            ShoppingCart, ShoppingListItem, Tag)
+from recipes.search import ingredient_index
+from users.serializers import RecipeSubscribeSerializer
 
 
 class TagViewSet(viewsets.ModelViewSet):
@@ -27,16 +39,70 @@ class IngredientViewSet(viewsets.ModelViewSet):
     queryset = Ingredient.objects.all()
     serializer_class = IngredientsSerializer
     permission_classes = (AllowAny,)
-    filter_backends = (IngredientSearchFilter,)
-    search_fields = ('^name',)
     pagination_class = None
 
+    def list(self, request, *args, **kwargs):
+        try:
+            limit = int(request.query_params['limit'])
+        except (KeyError, ValueError):
+            limit = None
+        else:
+            limit = max(limit, 0)
+        ingredients = ingredient_index.search(
+            request.query_params.get('name', ''), limit=limit
+        )
+        return Response(ingredients)
+
 
-class RecipeViewSet(viewsets.ModelViewSet):
+class RecipeViewSet(ConditionalGetMixin, AnonymousCacheMixin,
+                    viewsets.ModelViewSet):
     queryset = Recipe.objects.all()
     permission_classes = (IsAuthorOrReadOnly,)
     filter_class = RecipeFilter
     filter_backends = (DjangoFilterBackend,)
+    pagination_class = RecipePagination
+
+    @property
+    def paginator(self):
+        if not hasattr(self, '_paginator'):
+            params = self.request.query_params
+            if params.get('pagination') == 'cursor' or 'cursor' in params:
+                self._paginator = RecipeCursorPagination()
+            else:
+                self._paginator = self.pagination_class()
+        return self._paginator
+
+    def get_etag_keys(self):
+        keys = [versions.CATALOG, versions.USERS]
+        if self.action == 'list':
+            keys.append(versions.RECIPES)
+        return keys + super().get_etag_keys()
+
+    def get_etag_extra(self):
+        if self.action == 'retrieve':
+            return Recipe.objects.filter(
+                pk=self.kwargs['pk']
+            ).values_list('updated_at', flat=True).first()
+        return None
+
+    def get_queryset(self):
+        if self.request.method in SAFE_METHODS:
+            return self.get_read_queryset()
+        return super().get_queryset()
+
+    def get_read_queryset(self):
+        queryset = Recipe.objects.select_related('card')
+        user = self.request.user
+        if user.is_anonymous:
+            return queryset
+        return queryset.annotate(
+            is_favorited=Exists(Favorite.objects.filter(
+                user=user, recipe=OuterRef('pk')
+            )),
+            is_in_shopping_cart=Exists(ShoppingCart.objects.filter(
+                user=user, recipe=OuterRef('pk')
+            ))
+        )
 
     def perform_create(self, serializer):
         serializer.save(author=self.request.user)
@@ -46,16 +112,34 @@ class RecipeViewSet(viewsets.ModelViewSet):
             return RecipeListSerializer
         return CreateRecipeSerializer
 
+    @action(detail=False, methods=['GET'],
+            permission_classes=(IsAuthenticated,))
+    def feed(self, request):
+        paginator = FeedPagination()
+        entries = paginator.paginate_queryset(
+            FeedEntry.objects.filter(user=request.user).only(
+                'id', 'recipe_id', 'pub_date'
+            ), request, view=self
+        )
+        recipes = self.get_queryset().in_bulk(
+            [entry.recipe_id for entry in entries]
+        )
+        serializer = RecipeListSerializer(
+            [recipes[entry.recipe_id] for entry in entries
+             if entry.recipe_id in recipes],
+            many=True, context=self.get_serializer_context()
+        )
+        return paginator.get_paginated_response(serializer.data)
+
     @action(detail=False, methods=['GET'],
             permission_classes=(IsAuthenticated,))
     def download_shopping_cart(self, request):
-        ingredients = IngredientRecipe.objects.filter(
-            recipe__shopping_carts__user=request.user
+        ingredients = ShoppingListItem.objects.filter(
+            user=request.user
         ).values(
-            'ingredient__name', 'ingredient__measurement_unit'
-        ).order_by('ingredient__name').annotate(
-            total_ingredients=Sum('amount')
-        )
+            'ingredient__name', 'ingredient__measurement_unit',
+            total_ingredients=F('amount')
+        ).order_by('ingredient__name')
         pdf = pdf_create(ingredients)
         return pdf
 
@@ -63,20 +147,71 @@ class RecipeViewSet(viewsets.ModelViewSet):
 class BaseCreateDeleteFavoriteCartViewSet(viewsets.ModelViewSet):
     permission_classes = (IsAuthenticated,)
 
+    @transaction.atomic
     def create(self, request, *args, **kwargs):
         recipe_id = self.kwargs['recipes_id']
         recipe = get_object_or_404(Recipe, id=recipe_id)
-        self.model.objects.create(user=request.user, recipe=recipe)
-        return Response(request.data, status=status.HTTP_201_CREATED)
+        relations.lock_user(request.user.id)
+        _, created = self.model.objects.get_or_create(
+            user=request.user, recipe=recipe
+        )
+        return Response(
+            RecipeSubscribeSerializer(
+                recipe, context={'request': request}
+            ).data,
+            status=status.HTTP_201_CREATED if created else status.HTTP_200_OK
+        )
 
+    @transaction.atomic
     def delete(self, request, *args, **kwargs):
         recipe_id = self.kwargs['recipes_id']
-        obj = get_object_or_404(
-            self.model, user__id=request.user.id, recipe__id=recipe_id
-        )
-        obj.delete()
+        relations.lock_user(request.user.id)
+        self.model.objects.filter(
+            user__id=request.user.id, recipe__id=recipe_id
+        ).delete()
         return Response(status=status.HTTP_204_NO_CONTENT)
 
+    def get_recipe_ids(self, request):
+        serializer = RecipeIdsSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        return serializer.validated_data['recipes']
+
+    def get_state(self, user):
+        return Response({'recipes': sorted(self.model.objects.filter(
+            user=user
+        ).values_list('recipe_id', flat=True))})
+
+    @transaction.atomic
+    def bulk_add(self, request, *args, **kwargs):
+        recipe_ids = self.get_recipe_ids(request)
+        relations.lock_user(request.user.id)
+        existing = set(self.model.objects.filter(
+            user=request.user, recipe_id__in=recipe_ids
+        ).values_list('recipe_id', flat=True))
+        added = [
+            recipe_id for recipe_id in dict.fromkeys(recipe_ids)
+            if recipe_id not in existing
+        ]
+        self.model.objects.bulk_create(
+            (self.model(user=request.user, recipe_id=recipe_id)
+             for recipe_id in added),
+            ignore_conflicts=True
+        )
+        # bulk_create sends no post_save.
+        relations.changed(self.model, request.user.id, added=added)
+        return self.get_state(request.user)
+
+    @transaction.atomic
+    def bulk_remove(self, request, *args, **kwargs):
+        recipe_ids = self.get_recipe_ids(request)
+        relations.lock_user(request.user.id)
+        # The receivers of the deleted rows are applied once, together.
+        with relations.collect():
+            self.model.objects.filter(
+                user=request.user, recipe_id__in=recipe_ids
+            ).delete()
+        return self.get_state(request.user)
+
 
 class FavoriteViewSet(BaseCreateDeleteFavoriteCartViewSet):
     queryset = Favorite.objects.all()
@@ -88,3 +223,12 @@ class ShoppingCartViewSet(BaseCreateDeleteFavoriteCartViewSet):
     queryset = ShoppingCart.objects.all()
     serializer_class = ShoppingCartSerializer
     model = ShoppingCart
+
+
+class MetricsView(APIView):
+    permission_classes = (IsAdminUser,)
+
+    def get(self, request):
+        return HttpResponse(
+            registry.render(), content_type='text/plain; version=0.0.4'
+        )
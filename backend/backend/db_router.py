@@ -0,0 +1,91 @@
+import itertools
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+from rest_framework.permissions import SAFE_METHODS
+
+logger = logging.getLogger(__name__)
+
+_state = threading.local()
+
+
+class ReplicaMiddleware:
+    # Lets the router send the reads of safe-method requests to replicas.
+    # The state is per thread and dropped when the request ends, so
+    # background threads and management commands always use the primary.
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        _state.use_replica = request.method in SAFE_METHODS
+        _state.wrote = False
+        try:
+            return self.get_response(request)
+        finally:
+            _state.use_replica = False
+            _state.wrote = False
+
+
+class ReplicaSelector:
+    # Round-robin over the replicas that passed their last health check.
+    # A replica is checked again at most every DATABASE_REPLICA_CHECK_INTERVAL
+    # seconds.
+
+    def __init__(self, aliases):
+        self.aliases = list(aliases)
+        self._cycle = itertools.cycle(self.aliases)
+        self._lock = threading.Lock()
+        self._checked = {}
+
+    def is_healthy(self, alias):
+        now = time.monotonic()
+        interval = settings.DATABASE_REPLICA_CHECK_INTERVAL
+        healthy, checked_at = self._checked.get(alias, (True, None))
+        if checked_at is not None and now - checked_at < interval:
+            return healthy
+        connection = connections[alias]
+        try:
+            connection.ensure_connection()
+            healthy = connection.is_usable()
+        except Exception:
+            healthy = False
+        if not healthy:
+            logger.warning('Database replica %s is unavailable', alias)
+            connection.close()
+        self._checked[alias] = (healthy, now)
+        return healthy
+
+    def choose(self):
+        for _ in range(len(self.aliases)):
+            with self._lock:
+                alias = next(self._cycle)
+            if self.is_healthy(alias):
+                return alias
+        return DEFAULT_DB_ALIAS
+
+
+class ReplicaRouter:
+    def __init__(self):
+        self.selector = ReplicaSelector(settings.DATABASE_REPLICA_ALIASES)
+
+    def db_for_read(self, model, **hints):
+        if (not getattr(_state, 'use_replica', False)
+                or getattr(_state, 'wrote', False)
+                or connections[DEFAULT_DB_ALIAS].in_atomic_block):
+            return DEFAULT_DB_ALIAS
+        return self.selector.choose()
+
+    def db_for_write(self, model, **hints):
+        # Reads after a write in the same request must see it.
+        _state.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == DEFAULT_DB_ALIAS
@@ -1,4 +1,5 @@
 import os
+import tempfile
 from datetime import timedelta
 from pathlib import Path
 
@@ -24,12 +25,15 @@ INSTALLED_APPS = [
     'rest_framework.authtoken',
     'djoser',
     'django_filters',
+    'backend.apps.BackendConfig',
     'api',
-    'recipes',
-    'users',
+    'recipes.apps.RecipesConfig',
+    'users.apps.UsersConfig',
 ]
 
 MIDDLEWARE = [
+    'api.metrics.MetricsMiddleware',
+    'backend.db_router.ReplicaMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -67,6 +71,7 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
+        'CONN_MAX_AGE': int(os.getenv('DB_CONN_MAX_AGE', default=0)),
     }
     # 'default': {
     #     'ENGINE': os.getenv('DB_ENGINE', default='django.db.backends.postgresql'),
@@ -78,6 +83,46 @@ DATABASES = {
     # }
 }
 
+# Applied to every new SQLite connection. WAL lets reads run during a
+# write and makes commits cheaper with synchronous = normal. busy_timeout
+# (ms) is how long a writer waits for the lock before "database is locked";
+# 5000 is also what Python's sqlite3 uses when it is not set. cache_size is
+# in KiB when negative, mmap_size in bytes.
+SQLITE_PRAGMAS = {
+    'journal_mode': os.getenv('SQLITE_JOURNAL_MODE', default='wal'),
+    'synchronous': os.getenv('SQLITE_SYNCHRONOUS', default='normal'),
+    'busy_timeout': int(os.getenv('SQLITE_BUSY_TIMEOUT', default=5000)),
+    'cache_size': int(os.getenv('SQLITE_CACHE_SIZE', default=-20000)),
+    'mmap_size': int(os.getenv('SQLITE_MMAP_SIZE', default=134217728)),
+    'temp_store': 'memory',
+}
+
+# Read replicas: comma-separated database names (SQLite files) or hosts
+# (other engines) that otherwise share the default connection settings.
+# Reads of GET/HEAD/OPTIONS requests go to them until the request writes.
+DATABASE_REPLICA_ALIASES = []
+for index, replica in enumerate(
+    filter(None, os.getenv('DATABASE_REPLICAS', default='').split(',')), 1
+):
+    alias = f'replica{index}'
+    location = (
+        'NAME' if DATABASES['default']['ENGINE'].endswith('sqlite3')
+        else 'HOST'
+    )
+    DATABASES[alias] = dict(
+        DATABASES['default'], **{location: replica.strip()},
+        TEST={'MIRROR': 'default'}
+    )
+    DATABASE_REPLICA_ALIASES.append(alias)
+
+if DATABASE_REPLICA_ALIASES:
+    DATABASE_ROUTERS = ['backend.db_router.ReplicaRouter']
+
+# Seconds before an unavailable (or available) replica is checked again.
+DATABASE_REPLICA_CHECK_INTERVAL = int(
+    os.getenv('DATABASE_REPLICA_CHECK_INTERVAL', default=5)
+)
+
 
 # Password validation
 # https://docs.djangoproject.com/en/4.1/ref/settings/#auth-password-validators
@@ -135,6 +180,73 @@ REST_FRAMEWORK = {
     'DEFAULT_PAGINATION_CLASS': 'api.pagination.CustomPagination',
 }
 
+# Lifetime of the in-memory ingredient index in seconds: changes made by
+# other workers are picked up at most this late.
+INGREDIENT_INDEX_TTL = int(os.getenv('INGREDIENT_INDEX_TTL', default=300))
+
+# Per-route request metrics. Every worker adds its counters to the SQLite
+# file METRICS_STORE at most every METRICS_FLUSH_INTERVAL seconds.
+METRICS_ENABLED = os.getenv('METRICS_ENABLED', default='1') == '1'
+
+METRICS_STORE = os.getenv(
+    'METRICS_STORE',
+    default=os.path.join(tempfile.gettempdir(), 'foodgram-metrics.sqlite3')
+)
+
+METRICS_FLUSH_INTERVAL = int(os.getenv('METRICS_FLUSH_INTERVAL', default=10))
+
+# Use a cache shared by all workers (file, memcached, redis) in production:
+# invalidation of cached responses only reaches the cache it runs against.
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv(
+            'CACHE_BACKEND',
+            default='django.core.cache.backends.locmem.LocMemCache'
+        ),
+        'LOCATION': os.getenv('CACHE_LOCATION', default='foodgram'),
+    }
+}
+
+# How long anonymous recipe list and detail responses are cached.
+RECIPE_RESPONSE_CACHE_TIMEOUT = int(
+    os.getenv('RECIPE_RESPONSE_CACHE_TIMEOUT', default=300)
+)
+
+# How long the tag slug -> id map used by the recipe filter is cached.
+# Tag changes clear it, the timeout bounds staleness in other workers
+# when the cache is not shared.
+TAG_SLUGS_TIMEOUT = int(os.getenv('TAG_SLUGS_TIMEOUT', default=300))
+
+# How long the total of a paginated recipe list is cached, in seconds.
+PAGINATION_COUNT_TIMEOUT = int(
+    os.getenv('PAGINATION_COUNT_TIMEOUT', default=30)
+)
+
+# Admin changelists count at most this many rows exactly, see
+# recipes.paginators.EstimatedCountPaginator.
+ADMIN_EXACT_COUNT_LIMIT = int(
+    os.getenv('ADMIN_EXACT_COUNT_LIMIT', default=10000)
+)
+
+# Resized recipe images: variant name -> bounding box size in pixels.
+RECIPE_IMAGE_VARIANTS = {'small': 320, 'medium': 640}
+
+RECIPE_IMAGE_QUALITY = 80
+
+# Thread pool size for background work inside web workers. With 0, image
+# variants are only created by the process_images command and new recipes
+# are added to followers' feeds in the request, after the commit.
+BACKGROUND_WORKERS = int(os.getenv('BACKGROUND_WORKERS', default=2))
+
+BACKGROUND_TASKS_EAGER = os.getenv('BACKGROUND_TASKS_EAGER') == '1'
+
+# How many recent recipes of an author are copied into a subscriber's
+# feed when they follow the author.
+FEED_BACKFILL_SIZE = int(os.getenv('FEED_BACKFILL_SIZE', default=50))
+
+# Text search configuration of the PostgreSQL recipe search index.
+RECIPE_SEARCH_CONFIG = os.getenv('RECIPE_SEARCH_CONFIG', default='russian')
+
 DJOSER = {
     'LOGIN_FIELD': 'email',
     'SERIALIZERS': {
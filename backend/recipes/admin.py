@@ -2,25 +2,37 @@ from django.contrib import admin
 
 from .models import (Favorite, Ingredient, IngredientRecipe, Recipe,
                      ShoppingCart, Tag, TagRecipe)
+from .paginators import EstimatedCountPaginator
 
 
 class IngredientRecipeInline(admin.TabularInline):
     model = IngredientRecipe
+    autocomplete_fields = ('ingredient',)
     min_num = 1
     extra = 0
 
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related(
+            'ingredient', 'recipe'
+        )
+
 
 class TagRecipeInline(admin.TabularInline):
     model = TagRecipe
     min_num = 1
     extra = 0
 
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related('tag', 'recipe')
+
 
 class IngredientAdmin(admin.ModelAdmin):
-    inlines = (IngredientRecipeInline,)
     list_display = ('name', 'measurement_unit')
     search_fields = ('name',)
-    list_filter = ('name',)
+    list_filter = ('measurement_unit',)
+    ordering = ('name',)
+    show_full_result_count = False
+    paginator = EstimatedCountPaginator
     empty_value_display = '-пусто-'
 
 
@@ -28,13 +40,21 @@ class RecipeAdmin(admin.ModelAdmin):
     inlines = (IngredientRecipeInline, TagRecipeInline)
     list_display = ('name', 'author', 'text', 'count_favorite',
                     'cooking_time', 'pub_date', 'id', 'some_ingredients')
-    search_fields = ('name', 'author', 'tags')
-    list_filter = ('name', 'author', 'tags')
+    list_select_related = ('author',)
+    search_fields = ('name', 'author__username')
+    list_filter = ('tags',)
+    autocomplete_fields = ('author',)
+    show_full_result_count = False
+    paginator = EstimatedCountPaginator
     empty_value_display = '-пусто-'
 
+    def get_queryset(self, request):
+        return super().get_queryset(request).prefetch_related('ingredients')
+
     def count_favorite(self, obj):
-        return Favorite.objects.filter(recipe=obj).count()
+        return obj.favorites_count
     count_favorite.short_description = 'Favorite number'
+    count_favorite.admin_order_field = 'favorites_count'
 
     def some_ingredients(self, obj):
         return list(obj.ingredients.all())
@@ -43,8 +63,11 @@ class RecipeAdmin(admin.ModelAdmin):
 
 class FavoriteAdmin(admin.ModelAdmin):
     list_display = ('user', 'recipe')
-    search_fields = ('user',)
-    list_filter = ('user',)
+    list_select_related = ('user', 'recipe')
+    search_fields = ('user__username', 'recipe__name')
+    raw_id_fields = ('user', 'recipe')
+    show_full_result_count = False
+    paginator = EstimatedCountPaginator
     empty_value_display = '-пусто-'
 
 
@@ -57,8 +80,11 @@ class TagAdmin(admin.ModelAdmin):
 
 class ShoppingCartAdmin(admin.ModelAdmin):
     list_display = ('user', 'recipe', 'id')
-    search_fields = ('user',)
-    list_filter = ('user',)
+    list_select_related = ('user', 'recipe')
+    search_fields = ('user__username', 'recipe__name')
+    raw_id_fields = ('user', 'recipe')
+    show_full_result_count = False
+    paginator = EstimatedCountPaginator
     empty_value_display = '-пусто-'
 
 
@@ -0,0 +1,130 @@
+import json
+from collections import defaultdict
+
+from django.db import transaction
+from django.utils import timezone
+
+from .images import variant_names
+from .models import IngredientRecipe, Recipe, RecipeCard, TagRecipe
+
+AUTHOR_FIELDS = ('email', 'id', 'username', 'first_name', 'last_name')
+
+
+def get_image_variants(recipe):
+    if not recipe.image or recipe.variants_source != recipe.image.name:
+        return None
+    storage = recipe.image.storage
+    return {
+        label: {
+            extension: storage.url(name)
+            for extension, name in names.items()
+        }
+        for label, names in variant_names(recipe.image.name).items()
+    }
+
+
+def build_cards(recipe_ids):
+    # The non-personal part of the recipe representation, with relative
+    # image urls, in three queries for any number of recipes. The recipes
+    # are read first: the parts read after them are at least as new as the
+    # updated_at the card is stamped with.
+    recipes = list(Recipe.objects.filter(
+        id__in=recipe_ids
+    ).select_related('author').order_by())
+    tags = defaultdict(list)
+    for row in TagRecipe.objects.filter(recipe_id__in=recipe_ids).order_by(
+        'tag_id'
+    ).values('recipe_id', 'tag_id', 'tag__name', 'tag__color', 'tag__slug'):
+        tags[row['recipe_id']].append({
+            'id': row['tag_id'],
+            'name': row['tag__name'],
+            'color': row['tag__color'],
+            'slug': row['tag__slug'],
+        })
+    ingredients = defaultdict(list)
+    for row in IngredientRecipe.objects.filter(
+        recipe_id__in=recipe_ids
+    ).order_by('id').values(
+        'recipe_id', 'ingredient_id', 'ingredient__name',
+        'ingredient__measurement_unit', 'amount'
+    ):
+        ingredients[row['recipe_id']].append({
+            'id': row['ingredient_id'],
+            'name': row['ingredient__name'],
+            'measurement_unit': row['ingredient__measurement_unit'],
+            'amount': row['amount'],
+        })
+    return [
+        RecipeCard(
+            recipe=recipe, source_updated_at=recipe.updated_at,
+            data=json.dumps({
+                'id': recipe.id,
+                'tags': tags[recipe.id],
+                'author': {
+                    field: getattr(recipe.author, field)
+                    for field in AUTHOR_FIELDS
+                },
+                'ingredients': ingredients[recipe.id],
+                'name': recipe.name,
+                'image': recipe.image.url if recipe.image else None,
+                'image_variants': get_image_variants(recipe),
+                'text': recipe.text,
+                'cooking_time': recipe.cooking_time,
+            }, ensure_ascii=False)
+        )
+        for recipe in recipes
+    ]
+
+
+def get_card(recipe):
+    try:
+        return recipe.card
+    except RecipeCard.DoesNotExist:
+        return None
+
+
+def is_current(recipe, card):
+    return card is not None and card.source_updated_at == recipe.updated_at
+
+
+def ensure_cards(recipes):
+    # Cards are rebuilt on read when missing or built from another version
+    # of the recipe. Every change of a card source stamps the recipe in
+    # the same transaction, so a card that a concurrent read built from
+    # older data is rejected here instead of being served. Returns the
+    # recipes that have a card, without those deleted since they were read.
+    stale = {
+        recipe.id: recipe for recipe in recipes
+        if not is_current(recipe, get_card(recipe))
+    }
+    if stale:
+        cards = build_cards(list(stale))
+        with transaction.atomic():
+            RecipeCard.objects.filter(recipe_id__in=stale).delete()
+            RecipeCard.objects.bulk_create(cards, ignore_conflicts=True)
+        for card in cards:
+            stale.pop(card.recipe_id).card = card
+    return [recipe for recipe in recipes if recipe.id not in stale]
+
+
+def invalidate(recipe_ids, touch=True):
+    # touch: set the recipes' updated_at, which makes the cards of readers
+    # racing with this transaction stale. Not needed after Recipe.save().
+    RecipeCard.objects.filter(recipe_id__in=recipe_ids).delete()
+    if touch:
+        Recipe.objects.filter(id__in=recipe_ids).update(
+            updated_at=timezone.now()
+        )
+
+
+def rebuild(chunk_size=500):
+    recipe_ids = list(Recipe.objects.order_by('id').values_list(
+        'id', flat=True
+    ))
+    with transaction.atomic():
+        RecipeCard.objects.all().delete()
+        for start in range(0, len(recipe_ids), chunk_size):
+            RecipeCard.objects.bulk_create(
+                build_cards(recipe_ids[start:start + chunk_size])
+            )
+    return len(recipe_ids)
@@ -0,0 +1,52 @@
+from django.db.models import (Case, Count, F, IntegerField, OuterRef,
+                              Subquery, Value, When)
+from django.db.models.functions import Coalesce, Greatest
+
+from .models import Favorite, Recipe, ShoppingCart
+from users.models import Subscribe, User
+
+
+def count_of(model, field):
+    return Coalesce(Subquery(
+        model.objects.filter(**{field: OuterRef('pk')}).order_by().values(
+            field
+        ).annotate(total=Count('id')).values('total')
+    ), Value(0))
+
+
+def change(model, pk, field, delta):
+    change_many(model, field, {pk: delta})
+
+
+def change_many(model, field, deltas):
+    # deltas: {pk: amount to add}. Stops at 0: a counter that drifted below
+    # the real count must not turn a delete into an error, recount()
+    # repairs it.
+    deltas = {pk: delta for pk, delta in deltas.items() if delta}
+    if not deltas:
+        return
+    model.objects.filter(pk__in=deltas).update(**{field: Greatest(
+        F(field) + Case(
+            *[When(pk=pk, then=Value(delta)) for pk, delta in deltas.items()],
+            output_field=IntegerField()
+        ),
+        Value(0)
+    )})
+
+
+def recount():
+    Recipe.objects.update(
+        favorites_count=count_of(Favorite, 'recipe'),
+        shopping_carts_count=count_of(ShoppingCart, 'recipe'),
+    )
+    User.objects.update(
+        recipes_count=count_of(Recipe, 'author'),
+        followers_count=count_of(Subscribe, 'following'),
+    )
+
+
+def recount_recipes(recipe_ids):
+    Recipe.objects.filter(id__in=recipe_ids).update(
+        favorites_count=count_of(Favorite, 'recipe'),
+        shopping_carts_count=count_of(ShoppingCart, 'recipe'),
+    )
@@ -0,0 +1,88 @@
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import OuterRef, Subquery
+
+from .models import FeedEntry, Recipe
+from users.models import Subscribe
+
+
+def fan_out(recipe_id):
+    recipe = Recipe.objects.filter(pk=recipe_id).values(
+        'author_id', 'pub_date'
+    ).first()
+    if recipe is None:
+        return
+    follower_ids = Subscribe.objects.filter(
+        following_id=recipe['author_id']
+    ).values_list('user_id', flat=True)
+    FeedEntry.objects.bulk_create(
+        (FeedEntry(
+            user_id=user_id, recipe_id=recipe_id, pub_date=recipe['pub_date']
+        ) for user_id in follower_ids.iterator()),
+        ignore_conflicts=True
+    )
+
+
+def get_recent_recipes(author_ids):
+    recent = defaultdict(list)
+    recipes = Recipe.objects.filter(
+        author_id__in=author_ids
+    ).filter(id__in=Subquery(
+        Recipe.objects.filter(
+            author=OuterRef('author')
+        ).order_by('-pub_date', '-id').values(
+            'id'
+        )[:settings.FEED_BACKFILL_SIZE]
+    )).values_list('author_id', 'id', 'pub_date')
+    for author_id, recipe_id, pub_date in recipes:
+        recent[author_id].append((recipe_id, pub_date))
+    return recent
+
+
+def backfill(user_id, author_id):
+    FeedEntry.objects.bulk_create(
+        (FeedEntry(user_id=user_id, recipe_id=recipe_id, pub_date=pub_date)
+         for recipe_id, pub_date in get_recent_recipes([author_id])[
+             author_id
+         ]),
+        ignore_conflicts=True
+    )
+
+
+def prune(user_id, author_id):
+    FeedEntry.objects.filter(
+        user_id=user_id, recipe__author_id=author_id
+    ).delete()
+
+
+def rebuild(user_ids=None, chunk_size=100):
+    # Built per chunk of subscribers, so only chunk_size users' entries
+    # are in memory at a time.
+    subscriptions = Subscribe.objects.all()
+    entries = FeedEntry.objects.all()
+    if user_ids is not None:
+        subscriptions = subscriptions.filter(user_id__in=user_ids)
+        entries = entries.filter(user_id__in=user_ids)
+    subscriber_ids = list(subscriptions.order_by('user_id').values_list(
+        'user_id', flat=True
+    ).distinct())
+    count = 0
+    with transaction.atomic():
+        entries.delete()
+        for start in range(0, len(subscriber_ids), chunk_size):
+            pairs = list(Subscribe.objects.filter(
+                user_id__in=subscriber_ids[start:start + chunk_size]
+            ).values_list('user_id', 'following_id'))
+            recent = get_recent_recipes({author_id for _, author_id in pairs})
+            chunk = [
+                FeedEntry(
+                    user_id=user_id, recipe_id=recipe_id, pub_date=pub_date
+                )
+                for user_id, author_id in pairs
+                for recipe_id, pub_date in recent[author_id]
+            ]
+            FeedEntry.objects.bulk_create(chunk)
+            count += len(chunk)
+    return count
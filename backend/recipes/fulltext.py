@@ -0,0 +1,192 @@
+import re
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import FloatField, Q
+from django.db.models.expressions import RawSQL
+
+from .models import Recipe
+from .search import normalize
+
+WORD = re.compile(r'\w+')
+
+
+class RawSubquery(RawSQL):
+    # RawSQL is parenthesized and the IN lookup parenthesizes it again,
+    # which turns the subquery into a scalar.
+
+    def as_sql(self, compiler, connection):
+        return self.sql, self.params
+
+
+def get_words(query):
+    return WORD.findall(normalize(query))
+
+
+class SQLiteBackend:
+    # FTS5 shadow table with rowid = recipe id.
+    table = 'recipes_recipe_fts'
+
+    def create(self, cursor):
+        cursor.execute(
+            f'CREATE VIRTUAL TABLE IF NOT EXISTS {self.table} USING '
+            f"fts5(name, text, tokenize='unicode61 remove_diacritics 2')"
+        )
+
+    def drop(self, cursor):
+        cursor.execute(f'DROP TABLE IF EXISTS {self.table}')
+
+    def index(self, cursor, rows):
+        cursor.executemany(
+            f'INSERT OR REPLACE INTO {self.table} (rowid, name, text) '
+            'VALUES (%s, %s, %s)',
+            [(pk, normalize(name), normalize(text)) for pk, name, text in rows]
+        )
+
+    def remove(self, cursor, pk):
+        cursor.execute(f'DELETE FROM {self.table} WHERE rowid = %s', [pk])
+
+    def clear(self, cursor):
+        cursor.execute(f'DELETE FROM {self.table}')
+
+    def get_query(self, words):
+        # Every word is quoted, so user input cannot inject FTS5 syntax,
+        # and matched as a prefix.
+        return ' '.join(f'"{word}"*' for word in words)
+
+    def matches(self, query):
+        return RawSubquery(
+            f'SELECT rowid FROM {self.table} WHERE {self.table} MATCH %s',
+            (query,)
+        )
+
+    def rank(self, query):
+        table = Recipe._meta.db_table
+        return RawSQL(
+            f'SELECT -bm25({self.table}, 10.0, 1.0) FROM {self.table} '
+            f'WHERE {self.table} MATCH %s AND rowid = "{table}"."id"',
+            (query,), output_field=FloatField()
+        )
+
+
+class PostgresBackend:
+    # Weighted tsvector per recipe in a side table with a GIN index.
+    table = 'recipes_recipe_search'
+
+    @property
+    def config(self):
+        return settings.RECIPE_SEARCH_CONFIG
+
+    def create(self, cursor):
+        cursor.execute(
+            f'CREATE TABLE IF NOT EXISTS {self.table} ('
+            'recipe_id integer PRIMARY KEY REFERENCES recipes_recipe (id) '
+            'ON DELETE CASCADE DEFERRABLE INITIALLY DEFERRED, '
+            'document tsvector NOT NULL)'
+        )
+        cursor.execute(
+            f'CREATE INDEX IF NOT EXISTS {self.table}_document_idx '
+            f'ON {self.table} USING GIN (document)'
+        )
+
+    def drop(self, cursor):
+        cursor.execute(f'DROP TABLE IF EXISTS {self.table}')
+
+    def index(self, cursor, rows):
+        cursor.executemany(
+            f'INSERT INTO {self.table} (recipe_id, document) VALUES (%s, '
+            'setweight(to_tsvector(%s::regconfig, %s), \'A\') || '
+            'setweight(to_tsvector(%s::regconfig, %s), \'B\')) '
+            'ON CONFLICT (recipe_id) DO UPDATE SET document = '
+            'EXCLUDED.document',
+            [(pk, self.config, normalize(name), self.config, normalize(text))
+             for pk, name, text in rows]
+        )
+
+    def remove(self, cursor, pk):
+        cursor.execute(
+            f'DELETE FROM {self.table} WHERE recipe_id = %s', [pk]
+        )
+
+    def clear(self, cursor):
+        cursor.execute(f'TRUNCATE {self.table}')
+
+    def get_query(self, words):
+        return ' & '.join(f'{word}:*' for word in words)
+
+    def matches(self, query):
+        return RawSubquery(
+            f'SELECT recipe_id FROM {self.table} '
+            'WHERE document @@ to_tsquery(%s::regconfig, %s)',
+            (self.config, query)
+        )
+
+    def rank(self, query):
+        table = Recipe._meta.db_table
+        return RawSQL(
+            f'SELECT ts_rank(document, to_tsquery(%s::regconfig, %s)) '
+            f'FROM {self.table} WHERE recipe_id = "{table}"."id"',
+            (self.config, query), output_field=FloatField()
+        )
+
+
+BACKENDS = {
+    'sqlite': SQLiteBackend,
+    'postgresql': PostgresBackend,
+}
+
+
+def get_backend(vendor=None):
+    backend = BACKENDS.get(vendor or connection.vendor)
+    return backend() if backend else None
+
+
+def index_recipes(rows):
+    backend = get_backend()
+    if backend is not None:
+        with connection.cursor() as cursor:
+            backend.index(cursor, rows)
+
+
+def remove_recipe(pk):
+    backend = get_backend()
+    if backend is not None:
+        with connection.cursor() as cursor:
+            backend.remove(cursor, pk)
+
+
+def rebuild(chunk_size=1000):
+    backend = get_backend()
+    if backend is None:
+        return 0
+    count = 0
+    rows = Recipe.objects.order_by().values_list('id', 'name', 'text')
+    with connection.cursor() as cursor:
+        backend.clear(cursor)
+        chunk = []
+        for row in rows.iterator(chunk_size=chunk_size):
+            chunk.append(row)
+            if len(chunk) == chunk_size:
+                backend.index(cursor, chunk)
+                count += len(chunk)
+                chunk = []
+        if chunk:
+            backend.index(cursor, chunk)
+            count += len(chunk)
+    return count
+
+
+def search(queryset, query):
+    words = get_words(query)
+    if not words:
+        return queryset
+    backend = get_backend()
+    if backend is None:
+        condition = Q()
+        for word in words:
+            condition &= Q(name__icontains=word) | Q(text__icontains=word)
+        return queryset.filter(condition)
+    query = backend.get_query(words)
+    return queryset.filter(id__in=backend.matches(query)).annotate(
+        search_rank=backend.rank(query)
+    ).order_by('-search_rank', '-pub_date', '-id')
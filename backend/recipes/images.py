@@ -0,0 +1,75 @@
+import hashlib
+import os
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.utils import timezone
+from drf_extra_fields.fields import Base64ImageField
+from PIL import Image, ImageOps, features
+
+from . import response_cache, versions
+from .models import Recipe, RecipeCard
+
+VARIANTS_ROOT = 'recipes/variants'
+
+
+class HashedBase64ImageField(Base64ImageField):
+    def get_file_name(self, decoded_file):
+        return hashlib.sha256(decoded_file).hexdigest()
+
+
+def get_formats():
+    formats = [('JPEG', 'jpg')]
+    if features.check('webp'):
+        formats.append(('WEBP', 'webp'))
+    return formats
+
+
+def variant_name(image_name, size, extension):
+    stem = os.path.splitext(os.path.basename(image_name))[0]
+    return f'{VARIANTS_ROOT}/{stem}_{size}.{extension}'
+
+
+def variant_names(image_name):
+    return {
+        label: {
+            extension: variant_name(image_name, size, extension)
+            for _, extension in get_formats()
+        }
+        for label, size in settings.RECIPE_IMAGE_VARIANTS.items()
+    }
+
+
+def encode(image, image_format):
+    output = BytesIO()
+    image.save(
+        output, image_format, quality=settings.RECIPE_IMAGE_QUALITY,
+        optimize=True
+    )
+    return ContentFile(output.getvalue())
+
+
+def create_variants(recipe_id):
+    recipe = Recipe.objects.filter(pk=recipe_id).only('image').first()
+    if recipe is None or not recipe.image:
+        return
+    storage = recipe.image.storage
+    with storage.open(recipe.image.name) as file:
+        original = ImageOps.exif_transpose(Image.open(file))
+        original = original.convert('RGB')
+    for size in set(settings.RECIPE_IMAGE_VARIANTS.values()):
+        image = original.copy()
+        image.thumbnail((size, size), Image.LANCZOS)
+        for image_format, extension in get_formats():
+            name = variant_name(recipe.image.name, size, extension)
+            if not storage.exists(name):
+                storage.save(name, encode(image, image_format))
+    # update() sends no signals: the timestamp and the version keep the
+    # ETags of the recipe responses in step with the new variants.
+    if Recipe.objects.filter(
+        pk=recipe_id, image=recipe.image.name
+    ).update(variants_source=recipe.image.name, updated_at=timezone.now()):
+        versions.bump(versions.RECIPES)
+        RecipeCard.objects.filter(recipe_id=recipe_id).delete()
+        response_cache.invalidate_recipes([recipe_id])
@@ -0,0 +1,193 @@
+import random
+import time
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from faker import Faker
+
+from recipes import cards, feed, fulltext, shopping_list
+from recipes.counters import recount
+from recipes.models import (Favorite, Ingredient, IngredientRecipe, Recipe,
+                            ShoppingCart, Tag, TagRecipe)
+from users.models import Subscribe, User
+
+POOL_SIZE = 500
+DEFAULT_TAGS = (
+    ('Завтрак', '#E26C2D', 'breakfast'),
+    ('Обед', '#49B64E', 'lunch'),
+    ('Ужин', '#8775D2', 'dinner'),
+)
+
+
+class Command(BaseCommand):
+    help = 'Generate a synthetic dataset with bulk inserts for benchmarks.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--recipes', type=int, default=10000)
+        parser.add_argument(
+            '--ingredients-per-recipe', type=int, default=10,
+            help='Number of ingredient rows of every recipe.'
+        )
+        parser.add_argument(
+            '--favorites', type=int, default=20,
+            help='Average number of favorites per user.'
+        )
+        parser.add_argument(
+            '--carts', type=int, default=5,
+            help='Average number of shopping cart recipes per user.'
+        )
+        parser.add_argument(
+            '--subscriptions', type=int, default=10,
+            help='Average number of followed authors per user.'
+        )
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument(
+            '--image', default='recipes/image/sample.png',
+            help='Image path stored for every generated recipe.'
+        )
+
+    def report(self, label, count, start):
+        elapsed = time.perf_counter() - start
+        self.stdout.write(
+            f'{label}: {count} rows in {elapsed:.1f}s '
+            f'({count / max(elapsed, 1e-9):.0f} rows/s)'
+        )
+
+    def batches(self, total):
+        for start in range(0, total, self.batch_size):
+            yield range(start, min(start + self.batch_size, total))
+
+    @staticmethod
+    def new_ids(model, last_id):
+        return list(model.objects.filter(
+            id__gt=last_id
+        ).order_by('id').values_list('id', flat=True))
+
+    @staticmethod
+    def last_id(model):
+        return model.objects.order_by('-id').values_list(
+            'id', flat=True
+        ).first() or 0
+
+    def create_users(self, count):
+        start = time.perf_counter()
+        password = make_password('password')
+        offset = self.last_id(User)
+        for batch in self.batches(count):
+            User.objects.bulk_create(User(
+                email=f'bench{offset + i}@example.com',
+                username=f'bench{offset + i}',
+                first_name=self.random.choice(self.first_names),
+                last_name=self.random.choice(self.last_names),
+                password=password,
+            ) for i in batch)
+        ids = self.new_ids(User, offset)
+        self.report('Users', len(ids), start)
+        return ids
+
+    def create_recipes(self, count, user_ids, options):
+        start = time.perf_counter()
+        ingredient_ids = list(Ingredient.objects.values_list('id', flat=True))
+        tag_ids = list(Tag.objects.values_list('id', flat=True))
+        per_recipe = min(
+            options['ingredients_per_recipe'], len(ingredient_ids)
+        )
+        recipe_ids = []
+        rows = 0
+        for batch in self.batches(count):
+            last_id = self.last_id(Recipe)
+            Recipe.objects.bulk_create(Recipe(
+                author_id=self.random.choice(user_ids),
+                name=self.random.choice(self.names),
+                image=options['image'],
+                text=self.random.choice(self.texts),
+                cooking_time=self.random.randint(1, 180),
+            ) for _ in batch)
+            ids = self.new_ids(Recipe, last_id)
+            IngredientRecipe.objects.bulk_create((
+                IngredientRecipe(
+                    recipe_id=recipe_id, ingredient_id=ingredient_id,
+                    amount=self.random.randint(1, 500)
+                )
+                for recipe_id in ids
+                for ingredient_id in self.random.sample(
+                    ingredient_ids, per_recipe
+                )
+            ))
+            TagRecipe.objects.bulk_create((
+                TagRecipe(recipe_id=recipe_id, tag_id=tag_id)
+                for recipe_id in ids
+                for tag_id in self.random.sample(
+                    tag_ids, self.random.randint(1, len(tag_ids))
+                )
+            ))
+            recipe_ids.extend(ids)
+            rows += len(ids) * (1 + per_recipe)
+        self.report('Recipes with ingredients and tags', rows, start)
+        return recipe_ids
+
+    def create_pairs(self, label, model, field, user_ids, targets, average):
+        start = time.perf_counter()
+        total = len(user_ids) * average
+        for batch in self.batches(total):
+            model.objects.bulk_create((
+                model(**{
+                    'user_id': self.random.choice(user_ids),
+                    field: self.random.choice(targets),
+                })
+                for _ in batch
+            ), ignore_conflicts=True)
+        self.report(label, total, start)
+
+    def handle(self, *args, **options):
+        self.random = random.Random(options['seed'])
+        self.batch_size = options['batch_size']
+        if not Ingredient.objects.exists():
+            raise CommandError('No ingredients, run load_data first.')
+        fake = Faker('ru_RU')
+        fake.seed_instance(options['seed'])
+        self.first_names = [fake.first_name() for _ in range(POOL_SIZE)]
+        self.last_names = [fake.last_name() for _ in range(POOL_SIZE)]
+        self.names = [
+            fake.sentence(nb_words=3).rstrip('.') for _ in range(POOL_SIZE)
+        ]
+        self.texts = [fake.text(max_nb_chars=500) for _ in range(POOL_SIZE)]
+        for name, color, slug in DEFAULT_TAGS:
+            Tag.objects.get_or_create(
+                slug=slug, defaults={'name': name, 'color': color}
+            )
+
+        with transaction.atomic():
+            user_ids = self.create_users(options['users'])
+            recipe_ids = self.create_recipes(
+                options['recipes'], user_ids, options
+            )
+            self.create_pairs(
+                'Favorites', Favorite, 'recipe_id', user_ids, recipe_ids,
+                options['favorites']
+            )
+            self.create_pairs(
+                'Shopping carts', ShoppingCart, 'recipe_id', user_ids,
+                recipe_ids, options['carts']
+            )
+            self.create_pairs(
+                'Subscriptions', Subscribe, 'following_id', user_ids,
+                user_ids, options['subscriptions']
+            )
+            # bulk_create sends no signals, rebuild the derived data.
+            start = time.perf_counter()
+            count = shopping_list.rebuild(user_ids)
+            self.report('Shopping list items', count, start)
+            recount()
+            start = time.perf_counter()
+            count = fulltext.rebuild()
+            self.report('Search index', count, start)
+            start = time.perf_counter()
+            count = feed.rebuild(user_ids)
+            self.report('Feed entries', count, start)
+            start = time.perf_counter()
+            count = cards.rebuild()
+            self.report('Recipe cards', count, start)
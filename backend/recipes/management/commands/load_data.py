@@ -1,21 +1,176 @@
+import csv
+import io
 import json
 import os
+import time
 
 from django.conf import settings
-from django.core.management.base import BaseCommand
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
 
 from recipes.models import Ingredient
+from recipes.search import ingredient_index
 
 DATA_ROOT = os.path.join(settings.BASE_DIR, 'data')
+CHUNK_SIZE = 64 * 1024
+
+
+def iter_json_array(file, chunk_size=CHUNK_SIZE):
+    # Yields the items of a top-level JSON array without loading the whole
+    # document into memory.
+    decoder = json.JSONDecoder()
+    buffer = ''
+    started = eof = False
+    while True:
+        buffer = buffer.lstrip()
+        if not started and buffer:
+            if buffer[0] != '[':
+                raise ValueError('JSON input must be an array.')
+            buffer, started = buffer[1:], True
+            continue
+        if started and buffer[:1] == ',':
+            buffer = buffer[1:]
+            continue
+        if started and buffer[:1] == ']':
+            return
+        if started and buffer:
+            try:
+                item, end = decoder.raw_decode(buffer)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+            else:
+                yield item
+                buffer = buffer[end:]
+                continue
+        if eof:
+            raise ValueError('Unexpected end of JSON input.')
+        chunk = file.read(chunk_size)
+        eof = not chunk
+        buffer += chunk
+
+
+def iter_json(file):
+    for item in iter_json_array(file):
+        yield item['name'], item['measurement_unit']
+
+
+def iter_csv(file):
+    for row in csv.reader(file):
+        if not row or row == ['name', 'measurement_unit']:
+            continue
+        yield row[0], row[1]
+
+
+class CSVStream(io.TextIOBase):
+    # File-like object that encodes rows as CSV on demand for COPY.
+
+    def __init__(self, rows):
+        self._rows = rows
+        self._buffer = ''
+        self._line = io.StringIO()
+        self._writer = csv.writer(self._line)
+
+    def readable(self):
+        return True
+
+    def read(self, size=-1):
+        while size < 0 or len(self._buffer) < size:
+            row = next(self._rows, None)
+            if row is None:
+                break
+            self._line.seek(0)
+            self._line.truncate()
+            self._writer.writerow(row)
+            self._buffer += self._line.getvalue()
+        if size < 0:
+            size = len(self._buffer)
+        data, self._buffer = self._buffer[:size], self._buffer[size:]
+        return data
 
 
 class Command(BaseCommand):
+    help = 'Load ingredients from a JSON or CSV file, skipping existing ones.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'path', nargs='?',
+            default=os.path.join(DATA_ROOT, 'ingredients.json'),
+            help='Path to the JSON or CSV file.'
+        )
+        parser.add_argument(
+            '--format', choices=('json', 'csv'),
+            help='Input format; detected by the file extension by default.'
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Number of rows per INSERT.'
+        )
+
+    def read_rows(self, file, file_format):
+        rows = iter_csv(file) if file_format == 'csv' else iter_json(file)
+        for name, measurement_unit in rows:
+            self.read_count += 1
+            yield name.strip(), measurement_unit.strip()
+
+    def insert_batches(self, rows, batch_size):
+        seen = set(Ingredient.objects.values_list('name', 'measurement_unit'))
+        created = 0
+        batch = []
+        for row in rows:
+            if row in seen:
+                continue
+            seen.add(row)
+            batch.append(Ingredient(name=row[0], measurement_unit=row[1]))
+            if len(batch) >= batch_size:
+                Ingredient.objects.bulk_create(batch, ignore_conflicts=True)
+                created += len(batch)
+                batch = []
+        Ingredient.objects.bulk_create(batch, ignore_conflicts=True)
+        return created + len(batch)
+
+    @staticmethod
+    def copy_postgres(rows):
+        table = Ingredient._meta.db_table
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'CREATE TEMP TABLE ingredient_load '
+                '(name varchar(200), measurement_unit varchar(200)) '
+                'ON COMMIT DROP'
+            )
+            cursor.copy_expert(
+                'COPY ingredient_load FROM STDIN WITH (FORMAT csv)',
+                CSVStream(rows)
+            )
+            cursor.execute(
+                f'INSERT INTO {table} (name, measurement_unit) '
+                'SELECT DISTINCT name, measurement_unit FROM ingredient_load '
+                'ON CONFLICT (name, measurement_unit) DO NOTHING'
+            )
+            return cursor.rowcount
+
     def handle(self, *args, **options):
-        with open('data/ingredients.json', 'rb') as f:
-            data = json.load(f)
-            for i in data:
-                ingredient = Ingredient()
-                ingredient.name = i['name']
-                ingredient.measurement_unit = i['measurement_unit']
-                ingredient.save()
-                print(i['name'], i['measurement_unit'])
+        path = options['path']
+        file_format = options['format'] or (
+            'csv' if path.lower().endswith('.csv') else 'json'
+        )
+        self.read_count = 0
+        start = time.perf_counter()
+        try:
+            with open(path, encoding='utf-8', newline='') as file:
+                rows = self.read_rows(file, file_format)
+                with transaction.atomic():
+                    if connection.vendor == 'postgresql':
+                        created = self.copy_postgres(rows)
+                    else:
+                        created = self.insert_batches(
+                            rows, options['batch_size']
+                        )
+        except (OSError, ValueError, KeyError, IndexError) as error:
+            raise CommandError(f'Cannot load {path}: {error!r}')
+        ingredient_index.invalidate()
+        elapsed = time.perf_counter() - start
+        self.stdout.write(self.style.SUCCESS(
+            f'Read {self.read_count} rows, created {created} ingredients '
+            f'in {elapsed:.2f}s ({self.read_count / elapsed:.0f} rows/s).'
+        ))
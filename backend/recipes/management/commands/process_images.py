@@ -0,0 +1,40 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db.models import F
+
+from recipes.images import create_variants
+from recipes.models import Recipe
+
+
+class Command(BaseCommand):
+    help = 'Create resized image variants for recipes that lack them.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--watch', type=float, metavar='SECONDS',
+            help='Keep running and poll for new images at this interval.'
+        )
+
+    def process_pending(self):
+        pending = Recipe.objects.exclude(
+            variants_source=F('image')
+        ).values_list('id', flat=True)
+        count = 0
+        for recipe_id in pending.iterator():
+            try:
+                create_variants(recipe_id)
+            except (OSError, ValueError) as error:
+                self.stderr.write(f'Recipe {recipe_id}: {error}')
+            else:
+                count += 1
+        return count
+
+    def handle(self, *args, **options):
+        while True:
+            count = self.process_pending()
+            if count:
+                self.stdout.write(f'Processed {count} recipe images.')
+            if not options['watch']:
+                break
+            time.sleep(options['watch'])
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from recipes import feed
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the subscription feeds of users from their subscriptions.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--user', type=int, nargs='+', dest='user_ids',
+            help='Only process the given user ids.'
+        )
+
+    def handle(self, *args, **options):
+        count = feed.rebuild(options['user_ids'])
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {count} feed entries.'))
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from recipes import cards
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the denormalized recipe cards used to render recipes.'
+
+    def handle(self, *args, **options):
+        count = cards.rebuild()
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {count} recipe cards.'))
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from recipes import fulltext
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the full-text search index of recipes.'
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            count = fulltext.rebuild()
+        self.stdout.write(self.style.SUCCESS(f'Indexed {count} recipes.'))
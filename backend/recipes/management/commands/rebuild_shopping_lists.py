@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from recipes import shopping_list
+
+
+class Command(BaseCommand):
+    help = 'Rebuild or verify the aggregated shopping lists of users.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--user', type=int, nargs='+', dest='user_ids',
+            help='Only process the given user ids.'
+        )
+        parser.add_argument(
+            '--verify', action='store_true',
+            help='Only compare the aggregate with the carts.'
+        )
+
+    def handle(self, *args, **options):
+        user_ids = options['user_ids']
+        if options['verify']:
+            stale = shopping_list.find_stale_users(user_ids)
+            if stale:
+                raise CommandError(
+                    'Stale shopping lists for users: '
+                    + ', '.join(str(user_id) for user_id in sorted(stale))
+                )
+            self.stdout.write(self.style.SUCCESS('Shopping lists are valid.'))
+            return
+        count = shopping_list.rebuild(user_ids)
+        self.stdout.write(
+            self.style.SUCCESS(f'Rebuilt {count} shopping list items.')
+        )
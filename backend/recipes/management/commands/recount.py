@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from recipes.counters import recount
+
+
+class Command(BaseCommand):
+    help = 'Recalculate the denormalized recipe and user counters.'
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            recount()
+        self.stdout.write(self.style.SUCCESS('Counters are recalculated.'))
@@ -0,0 +1,50 @@
+# Generated by Django 2.2.16 on 2026-10-18 17:11
+
+from django.db import migrations, models
+
+
+def merge_duplicate_ingredients(apps, schema_editor):
+    Ingredient = apps.get_model('recipes', 'Ingredient')
+    IngredientRecipe = apps.get_model('recipes', 'IngredientRecipe')
+    ShoppingListItem = apps.get_model('recipes', 'ShoppingListItem')
+    duplicates = Ingredient.objects.values(
+        'name', 'measurement_unit'
+    ).annotate(
+        keep_id=models.Min('id'), total=models.Count('id')
+    ).filter(total__gt=1).order_by()
+    for group in duplicates:
+        keep_id = group['keep_id']
+        extra_ids = list(Ingredient.objects.filter(
+            name=group['name'], measurement_unit=group['measurement_unit']
+        ).exclude(id=keep_id).values_list('id', flat=True))
+        for model, owner in ((IngredientRecipe, 'recipe_id'),
+                             (ShoppingListItem, 'user_id')):
+            for row in model.objects.filter(ingredient_id__in=extra_ids):
+                target = model.objects.filter(
+                    ingredient_id=keep_id, **{owner: getattr(row, owner)}
+                ).first()
+                if target is None:
+                    row.ingredient_id = keep_id
+                    row.save()
+                else:
+                    target.amount += row.amount
+                    target.save()
+                    row.delete()
+        Ingredient.objects.filter(id__in=extra_ids).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0002_shoppinglistitem'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            merge_duplicate_ingredients, migrations.RunPython.noop
+        ),
+        migrations.AddConstraint(
+            model_name='ingredient',
+            constraint=models.UniqueConstraint(fields=('name', 'measurement_unit'), name='unique_ingredient'),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 2.2.16 on 2026-10-18 17:17
+
+import django.core.validators
+from django.db import migrations, models
+import recipes.storage
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0005_recipe_ordering'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='variants_source',
+            field=models.CharField(blank=True, max_length=100),
+        ),
+        migrations.AlterField(
+            model_name='recipe',
+            name='image',
+            field=models.ImageField(storage=recipes.storage.ContentAddressedStorage(), upload_to='recipes/image/', validators=[django.core.validators.MinValueValidator]),
+        ),
+    ]
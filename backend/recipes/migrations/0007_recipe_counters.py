@@ -0,0 +1,50 @@
+# Generated by Django 2.2.16 on 2026-10-18 17:19
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models.functions import Coalesce
+
+
+def count_of(model, field):
+    return Coalesce(models.Subquery(
+        model.objects.filter(**{field: models.OuterRef('pk')}).order_by(
+        ).values(field).annotate(total=models.Count('id')).values('total')
+    ), models.Value(0))
+
+
+def fill_counters(apps, schema_editor):
+    Favorite = apps.get_model('recipes', 'Favorite')
+    Recipe = apps.get_model('recipes', 'Recipe')
+    ShoppingCart = apps.get_model('recipes', 'ShoppingCart')
+    Subscribe = apps.get_model('users', 'Subscribe')
+    User = apps.get_model(settings.AUTH_USER_MODEL)
+    Recipe.objects.update(
+        favorites_count=count_of(Favorite, 'recipe'),
+        shopping_carts_count=count_of(ShoppingCart, 'recipe'),
+    )
+    User.objects.update(
+        recipes_count=count_of(Recipe, 'author'),
+        followers_count=count_of(Subscribe, 'following'),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0006_recipe_image_variants'),
+        ('users', '0002_user_counters'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='favorites_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='recipe',
+            name='shopping_carts_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+    ]
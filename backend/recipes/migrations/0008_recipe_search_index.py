@@ -0,0 +1,81 @@
+from django.conf import settings
+from django.db import migrations
+
+SQLITE_CREATE = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS recipes_recipe_fts USING "
+    "fts5(name, text, tokenize='unicode61 remove_diacritics 2')",
+]
+SQLITE_INSERT = (
+    'INSERT OR REPLACE INTO recipes_recipe_fts (rowid, name, text) '
+    'VALUES (%s, %s, %s)'
+)
+SQLITE_DROP = 'DROP TABLE IF EXISTS recipes_recipe_fts'
+
+POSTGRES_CREATE = [
+    'CREATE TABLE IF NOT EXISTS recipes_recipe_search ('
+    'recipe_id integer PRIMARY KEY REFERENCES recipes_recipe (id) '
+    'ON DELETE CASCADE DEFERRABLE INITIALLY DEFERRED, '
+    'document tsvector NOT NULL)',
+    'CREATE INDEX IF NOT EXISTS recipes_recipe_search_document_idx '
+    'ON recipes_recipe_search USING GIN (document)',
+]
+POSTGRES_INSERT = (
+    'INSERT INTO recipes_recipe_search (recipe_id, document) VALUES (%s, '
+    "setweight(to_tsvector(%s::regconfig, %s), 'A') || "
+    "setweight(to_tsvector(%s::regconfig, %s), 'B')) "
+    'ON CONFLICT (recipe_id) DO UPDATE SET document = EXCLUDED.document'
+)
+POSTGRES_DROP = 'DROP TABLE IF EXISTS recipes_recipe_search'
+
+
+def normalize(value):
+    # Copy of recipes.search.normalize at the time of this migration.
+    return value.casefold().replace('ё', 'е').strip()
+
+
+def create_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor not in ('sqlite', 'postgresql'):
+        return
+    with schema_editor.connection.cursor() as cursor:
+        if vendor == 'sqlite':
+            statements, insert = SQLITE_CREATE, SQLITE_INSERT
+        else:
+            statements, insert = POSTGRES_CREATE, POSTGRES_INSERT
+        for statement in statements:
+            cursor.execute(statement)
+        cursor.execute('SELECT id, name, text FROM recipes_recipe')
+        rows = cursor.fetchall()
+        if not rows:
+            return
+        if vendor == 'sqlite':
+            params = [
+                (pk, normalize(name), normalize(text))
+                for pk, name, text in rows
+            ]
+        else:
+            config = settings.RECIPE_SEARCH_CONFIG
+            params = [
+                (pk, config, normalize(name), config, normalize(text))
+                for pk, name, text in rows
+            ]
+        cursor.executemany(insert, params)
+
+
+def drop_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor not in ('sqlite', 'postgresql'):
+        return
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(SQLITE_DROP if vendor == 'sqlite' else POSTGRES_DROP)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0007_recipe_counters'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_index, drop_index),
+    ]
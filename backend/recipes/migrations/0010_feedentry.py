@@ -0,0 +1,52 @@
+# Generated by Django 2.2.16 on 2026-10-18 17:25
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+# The FEED_BACKFILL_SIZE most recent recipes of every followed author,
+# copied in one statement.
+FILL_FEEDS = (
+    'INSERT INTO recipes_feedentry (user_id, recipe_id, pub_date) '
+    'SELECT subscribe.user_id, recipe.id, recipe.pub_date '
+    'FROM users_subscribe subscribe '
+    'JOIN recipes_recipe recipe ON recipe.author_id = subscribe.following_id '
+    'WHERE recipe.id IN ('
+    'SELECT recent.id FROM recipes_recipe recent '
+    'WHERE recent.author_id = subscribe.following_id '
+    'ORDER BY recent.pub_date DESC, recent.id DESC LIMIT %s)'
+)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('recipes', '0009_recipe_author_pub_date_idx'),
+        ('users', '0002_user_counters'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FeedEntry',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('pub_date', models.DateTimeField()),
+                ('recipe', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='feed_entries', to='recipes.Recipe')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='feed_entries', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='feedentry',
+            index=models.Index(fields=['user', '-pub_date', '-id'], name='feed_user_pub_date_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='feedentry',
+            constraint=models.UniqueConstraint(fields=('user', 'recipe'), name='unique_feed_entry'),
+        ),
+        migrations.RunSQL(
+            [(FILL_FEEDS, [settings.FEED_BACKFILL_SIZE])],
+            migrations.RunSQL.noop
+        ),
+    ]
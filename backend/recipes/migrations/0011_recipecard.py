@@ -0,0 +1,21 @@
+# Generated by Django 2.2.16 on 2026-10-18 17:29
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0010_feedentry'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RecipeCard',
+            fields=[
+                ('recipe', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='card', serialize=False, to='recipes.Recipe')),
+                ('data', models.TextField()),
+            ],
+        ),
+    ]
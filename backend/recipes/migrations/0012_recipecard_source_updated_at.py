@@ -0,0 +1,18 @@
+# Generated by Django 2.2.16 on 2026-10-18 17:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0011_recipecard'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipecard',
+            name='source_updated_at',
+            field=models.DateTimeField(null=True),
+        ),
+    ]
@@ -1,12 +1,22 @@
 from django.core.validators import MinValueValidator
 from django.db import models
-from users.models import User
+from users.models import CountersMixin, User
+
+from .storage import ContentAddressedStorage
 
 
 class Ingredient(models.Model):
     name = models.CharField(max_length=200)
     measurement_unit = models.CharField(max_length=200)
 
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['name', 'measurement_unit'],
+                name='unique_ingredient'
+            )
+        ]
+
     def __str__(self):
         return self.name
 
@@ -20,7 +30,7 @@ class Tag(models.Model):
         return self.name
 
 
-class Recipe(models.Model):
+class Recipe(CountersMixin, models.Model):
     author = models.ForeignKey(
         User,
         on_delete=models.CASCADE,
@@ -28,8 +38,13 @@ class Recipe(models.Model):
     )
     name = models.CharField(max_length=200)
     image = models.ImageField(
-        upload_to='recipes/image/', validators=[MinValueValidator]
+        upload_to='recipes/image/', validators=[MinValueValidator],
+        storage=ContentAddressedStorage()
     )
+    variants_source = models.CharField(max_length=100, blank=True)
+    favorites_count = models.PositiveIntegerField(default=0)
+    shopping_carts_count = models.PositiveIntegerField(default=0)
+    counter_fields = ('favorites_count', 'shopping_carts_count')
     text = models.TextField()
     ingredients = models.ManyToManyField(
         Ingredient,
@@ -43,6 +58,19 @@ class Recipe(models.Model):
     )
     cooking_time = models.IntegerField(validators=[MinValueValidator(1)])
     pub_date = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ('-pub_date', '-id')
+        indexes = [
+            models.Index(
+                fields=['-pub_date', '-id'], name='recipe_pub_date_id_idx'
+            ),
+            models.Index(
+                fields=['author', '-pub_date'],
+                name='recipe_author_pub_date_idx'
+            ),
+        ]
 
     def __str__(self):
         return self.name
@@ -145,3 +173,81 @@ class Favorite(models.Model):
 
     def __str__(self):
         return f'{self.recipe} is favorite for {self.user}'
+
+
+class ShoppingListItem(models.Model):
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='shopping_list'
+    )
+    ingredient = models.ForeignKey(
+        Ingredient,
+        on_delete=models.CASCADE,
+        related_name='shopping_list_items'
+    )
+    amount = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'ingredient'],
+                name='unique_shopping_list_item'
+            )
+        ]
+
+    def __str__(self):
+        return f'{self.user} needs {self.amount} {self.ingredient}'
+
+
+class FeedEntry(models.Model):
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='feed_entries'
+    )
+    recipe = models.ForeignKey(
+        Recipe,
+        on_delete=models.CASCADE,
+        related_name='feed_entries'
+    )
+    pub_date = models.DateTimeField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'recipe'],
+                name='unique_feed_entry'
+            )
+        ]
+        indexes = [
+            models.Index(
+                fields=['user', '-pub_date', '-id'],
+                name='feed_user_pub_date_idx'
+            )
+        ]
+
+    def __str__(self):
+        return f'{self.recipe} in the feed of {self.user}'
+
+
+class RecipeCard(models.Model):
+    recipe = models.OneToOneField(
+        Recipe,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='card'
+    )
+    data = models.TextField()
+    source_updated_at = models.DateTimeField(null=True)
+
+    def __str__(self):
+        return f'Card of {self.recipe_id}'
+
+
+class ChangeVersion(models.Model):
+    key = models.CharField(max_length=100, unique=True)
+    value = models.BigIntegerField(default=0)
+
+    def __str__(self):
+        return f'{self.key}: {self.value}'
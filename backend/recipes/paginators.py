@@ -0,0 +1,36 @@
+from django.conf import settings
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import Max
+from django.utils.functional import cached_property
+
+
+def estimate_count(queryset):
+    connection = connections[queryset.db]
+    if connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT reltuples FROM pg_class WHERE relname = %s',
+                [queryset.model._meta.db_table]
+            )
+            row = cursor.fetchone()
+        return int(row[0]) if row else 0
+    # Ids are never reused, so the last one bounds the row count.
+    return queryset.model._base_manager.using(queryset.db).aggregate(
+        last=Max('pk')
+    )['last'] or 0
+
+
+class EstimatedCountPaginator(Paginator):
+    # For admin changelists: counting stops after ADMIN_EXACT_COUNT_LIMIT
+    # rows. Above it an unfiltered table reports an estimate and a filtered
+    # one the limit, so only its first pages are reachable.
+    @cached_property
+    def count(self):
+        limit = settings.ADMIN_EXACT_COUNT_LIMIT
+        count = self.object_list.order_by()[:limit + 1].count()
+        if count <= limit:
+            return count
+        if self.object_list.query.where:
+            return limit
+        return max(estimate_count(self.object_list), limit)
@@ -0,0 +1,73 @@
+import threading
+from collections import defaultdict
+from contextlib import contextmanager
+
+from . import counters, shopping_list, versions
+from .models import Favorite, Recipe, ShoppingCart
+from users.models import User
+
+_state = threading.local()
+
+
+def lock_user(user_id):
+    # Changes to one user's favorites and cart run one at a time, so the
+    # rows a bulk write finds stay valid until it commits.
+    list(User.objects.select_for_update().filter(pk=user_id).values_list(
+        'pk', flat=True
+    ))
+
+
+def get_deltas(added, removed):
+    deltas = defaultdict(int)
+    for recipe_id in added:
+        deltas[recipe_id] += 1
+    for recipe_id in removed:
+        deltas[recipe_id] -= 1
+    return deltas
+
+
+def favorites_changed(user_id, added=(), removed=()):
+    counters.change_many(
+        Recipe, 'favorites_count', get_deltas(added, removed)
+    )
+    versions.bump(versions.user_key(user_id))
+
+
+def shopping_cart_changed(user_id, added=(), removed=()):
+    counters.change_many(
+        Recipe, 'shopping_carts_count', get_deltas(added, removed)
+    )
+    versions.bump(versions.user_key(user_id))
+    shopping_list.cart_changed(user_id, added, removed)
+
+
+HANDLERS = {
+    Favorite: favorites_changed,
+    ShoppingCart: shopping_cart_changed,
+}
+
+
+def changed(model, user_id, added=(), removed=()):
+    # The one place that updates the data derived from favorites and carts:
+    # called by their receivers and by bulk writes, which send no signals.
+    pending = getattr(_state, 'pending', None)
+    if pending is not None:
+        entry = pending.setdefault((model, user_id), ([], []))
+        entry[0].extend(added)
+        entry[1].extend(removed)
+        return
+    HANDLERS[model](user_id, added, removed)
+
+
+@contextmanager
+def collect():
+    # Inside the block changes are only recorded, e.g. the post_delete of
+    # every row of a queryset delete, and applied per user when it ends.
+    _state.pending = {}
+    try:
+        yield
+        pending = _state.pending
+    finally:
+        _state.pending = None
+    for (model, user_id), (added, removed) in pending.items():
+        HANDLERS[model](user_id, added, removed)
@@ -0,0 +1,46 @@
+import hashlib
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+
+PREFIX = 'recipe-responses'
+GENERATION_KEY = f'{PREFIX}:generation'
+
+
+def get_generation():
+    generation = cache.get(GENERATION_KEY)
+    if generation is None:
+        cache.add(GENERATION_KEY, uuid.uuid4().hex, None)
+        generation = cache.get(GENERATION_KEY)
+    return generation
+
+
+def list_key(path, query):
+    digest = hashlib.md5(f'{path}?{query}'.encode()).hexdigest()
+    return f'{PREFIX}:list:{get_generation()}:{digest}'
+
+
+def detail_key(recipe_id):
+    return f'{PREFIX}:detail:{recipe_id}'
+
+
+def get(key, base_uri):
+    return (cache.get(key) or {}).get(base_uri)
+
+
+def store(key, base_uri, data):
+    # Links in the data are absolute, so entries are kept per host.
+    entry = cache.get(key) or {}
+    entry[base_uri] = data
+    cache.set(key, entry, settings.RECIPE_RESPONSE_CACHE_TIMEOUT)
+
+
+def invalidate_lists():
+    # Every list key embeds the generation, a new one orphans them all.
+    cache.set(GENERATION_KEY, uuid.uuid4().hex, None)
+
+
+def invalidate_recipes(recipe_ids):
+    invalidate_lists()
+    cache.delete_many([detail_key(recipe_id) for recipe_id in recipe_ids])
@@ -0,0 +1,111 @@
+import bisect
+import threading
+import time
+
+from django.conf import settings
+
+from .models import Ingredient
+
+
+def normalize(value):
+    return value.casefold().replace('ё', 'е').strip()
+
+
+class IngredientIndex:
+    # Process-local index over ingredient names: a sorted list of
+    # (normalized name, id) for binary-search prefix lookups and an
+    # id -> ingredient mapping used to build the response. Both are
+    # published together as one (keys, items) tuple that is never mutated,
+    # so lock-free readers always see a consistent pair.
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._data = ([], {})
+        self._built_at = None
+
+    def _is_stale(self):
+        ttl = settings.INGREDIENT_INDEX_TTL
+        built_at = self._built_at
+        return built_at is None or bool(
+            ttl and time.monotonic() - built_at > ttl
+        )
+
+    def _build(self):
+        items = {
+            pk: {'id': pk, 'name': name, 'measurement_unit': unit}
+            for pk, name, unit in Ingredient.objects.values_list(
+                'id', 'name', 'measurement_unit'
+            )
+        }
+        keys = sorted(
+            (normalize(item['name']), pk) for pk, item in items.items()
+        )
+        self._data = (keys, items)
+        self._built_at = time.monotonic()
+
+    def rebuild(self):
+        with self._lock:
+            self._build()
+
+    def invalidate(self):
+        with self._lock:
+            self._built_at = None
+
+    def update(self, ingredient):
+        with self._lock:
+            if self._built_at is None:
+                return
+            keys, items = self._without(ingredient.pk)
+            bisect.insort(keys, (normalize(ingredient.name), ingredient.pk))
+            items[ingredient.pk] = {
+                'id': ingredient.pk,
+                'name': ingredient.name,
+                'measurement_unit': ingredient.measurement_unit,
+            }
+            self._data = (keys, items)
+
+    def remove(self, pk):
+        with self._lock:
+            if self._built_at is None:
+                return
+            self._data = self._without(pk)
+
+    def _without(self, pk):
+        # Copy on write: readers keep working on the published tuple.
+        keys, items = self._data
+        keys, items = list(keys), dict(items)
+        item = items.pop(pk, None)
+        if item is not None:
+            keys.remove((normalize(item['name']), pk))
+        return keys, items
+
+    def _snapshot(self):
+        # Only one request rebuilds a stale index, the others wait for it.
+        if self._is_stale():
+            with self._lock:
+                if self._is_stale():
+                    self._build()
+        return self._data
+
+    def search(self, query, limit=None):
+        keys, items = self._snapshot()
+        query = normalize(query)
+        if not query:
+            found = [pk for _, pk in keys[:limit]]
+            return [items[pk] for pk in found]
+
+        found = []
+        start = bisect.bisect_left(keys, (query,))
+        for name, pk in keys[start:]:
+            if not name.startswith(query) or len(found) == limit:
+                break
+            found.append(pk)
+        for name, pk in keys:
+            if limit is not None and len(found) >= limit:
+                break
+            if query in name and not name.startswith(query):
+                found.append(pk)
+        return [items[pk] for pk in found]
+
+
+ingredient_index = IngredientIndex()
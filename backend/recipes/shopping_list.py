@@ -0,0 +1,131 @@
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import Case, F, IntegerField, Sum, Value, When
+
+from .models import IngredientRecipe, ShoppingCart, ShoppingListItem
+from users.models import User
+
+
+def apply_deltas(deltas):
+    # deltas: {(user_id, ingredient_id): amount to add, may be negative}
+    by_user = defaultdict(dict)
+    for (user_id, ingredient_id), delta in deltas.items():
+        if delta:
+            by_user[user_id][ingredient_id] = delta
+    if not by_user:
+        return
+    with transaction.atomic():
+        # Changes to one user's list are serialized by locking the user row,
+        # so two concurrent cart adds cannot both insert the same missing
+        # item. Ordered by id to avoid deadlocks between multi-user changes.
+        list(User.objects.select_for_update().filter(
+            id__in=by_user
+        ).order_by('id').values_list('id', flat=True))
+        existing = set(ShoppingListItem.objects.filter(
+            user_id__in=by_user,
+            ingredient_id__in={
+                ingredient_id
+                for changes in by_user.values() for ingredient_id in changes
+            }
+        ).values_list('user_id', 'ingredient_id'))
+        new_items = []
+        for user_id, changes in by_user.items():
+            to_update = {
+                ingredient_id: delta
+                for ingredient_id, delta in changes.items()
+                if (user_id, ingredient_id) in existing
+            }
+            new_items.extend(
+                ShoppingListItem(
+                    user_id=user_id, ingredient_id=ingredient_id, amount=delta
+                )
+                for ingredient_id, delta in changes.items()
+                if ingredient_id not in to_update and delta > 0
+            )
+            if to_update:
+                ShoppingListItem.objects.filter(
+                    user_id=user_id, ingredient_id__in=to_update
+                ).update(amount=F('amount') + Case(
+                    *[When(ingredient_id=ingredient_id, then=Value(delta))
+                      for ingredient_id, delta in to_update.items()],
+                    output_field=IntegerField()
+                ))
+        ShoppingListItem.objects.bulk_create(new_items)
+        ShoppingListItem.objects.filter(
+            user_id__in=by_user, amount__lte=0
+        ).delete()
+
+
+def cart_changed(user_id, added=(), removed=()):
+    signs = {recipe_id: 1 for recipe_id in added}
+    signs.update({recipe_id: -1 for recipe_id in removed})
+    deltas = defaultdict(int)
+    for recipe_id, ingredient_id, amount in IngredientRecipe.objects.filter(
+        recipe_id__in=signs
+    ).values_list('recipe_id', 'ingredient_id', 'amount'):
+        deltas[(user_id, ingredient_id)] += signs[recipe_id] * amount
+    apply_deltas(deltas)
+
+
+def ingredients_changed(recipe_id, changes):
+    # changes: {ingredient_id: amount delta} for one recipe
+    changes = {key: delta for key, delta in changes.items() if delta}
+    if not changes:
+        return
+    apply_deltas({
+        (user_id, ingredient_id): delta
+        for user_id in ShoppingCart.objects.filter(
+            recipe_id=recipe_id
+        ).values_list('user_id', flat=True)
+        for ingredient_id, delta in changes.items()
+    })
+
+
+def expected_totals(user_ids=None):
+    lookup = {'recipe__shopping_carts__isnull': False}
+    if user_ids is not None:
+        lookup = {'recipe__shopping_carts__user_id__in': user_ids}
+    return {
+        (row['recipe__shopping_carts__user'], row['ingredient']): row['total']
+        for row in IngredientRecipe.objects.filter(**lookup).values(
+            'recipe__shopping_carts__user', 'ingredient'
+        ).annotate(total=Sum('amount')).order_by()
+    }
+
+
+def stored_totals(user_ids=None):
+    items = ShoppingListItem.objects.all()
+    if user_ids is not None:
+        items = items.filter(user_id__in=user_ids)
+    return {
+        (user_id, ingredient_id): amount
+        for user_id, ingredient_id, amount in items.values_list(
+            'user_id', 'ingredient_id', 'amount'
+        )
+    }
+
+
+def find_stale_users(user_ids=None):
+    expected = expected_totals(user_ids)
+    stored = stored_totals(user_ids)
+    return {
+        user_id for user_id, ingredient_id in set(expected) | set(stored)
+        if expected.get((user_id, ingredient_id))
+        != stored.get((user_id, ingredient_id))
+    }
+
+
+def rebuild(user_ids=None):
+    totals = expected_totals(user_ids)
+    with transaction.atomic():
+        items = ShoppingListItem.objects.all()
+        if user_ids is not None:
+            items = items.filter(user_id__in=user_ids)
+        items.delete()
+        ShoppingListItem.objects.bulk_create(
+            (ShoppingListItem(
+                user_id=user_id, ingredient_id=ingredient_id, amount=amount
+            ) for (user_id, ingredient_id), amount in totals.items())
+        )
+    return len(totals)
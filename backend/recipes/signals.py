@@ -0,0 +1,165 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from . import (cards, counters, feed, fulltext, relations, response_cache,
+               shopping_list, tags, tasks, versions)
+from .models import (Favorite, Ingredient, IngredientRecipe, Recipe,
+                     ShoppingCart, Tag, TagRecipe)
+from .search import ingredient_index
+from users.models import Subscribe, User
+
+
+@receiver(post_save, sender=Ingredient)
+def update_ingredient_index(sender, instance, **kwargs):
+    transaction.on_commit(lambda: ingredient_index.update(instance))
+
+
+@receiver(post_delete, sender=Ingredient)
+def remove_from_ingredient_index(sender, instance, **kwargs):
+    pk = instance.pk
+    transaction.on_commit(lambda: ingredient_index.remove(pk))
+
+
+@receiver(post_save, sender=Tag)
+@receiver(post_delete, sender=Tag)
+def invalidate_tag_slugs(sender, **kwargs):
+    transaction.on_commit(tags.invalidate)
+
+
+@receiver(pre_save, sender=IngredientRecipe)
+def remember_ingredient_amount(sender, instance, **kwargs):
+    instance._previous = None
+    if instance.pk is not None:
+        instance._previous = IngredientRecipe.objects.filter(
+            pk=instance.pk
+        ).values_list('ingredient_id', 'amount').first()
+
+
+@receiver(post_save, sender=IngredientRecipe)
+def update_shopping_lists(sender, instance, **kwargs):
+    changes = {instance.ingredient_id: instance.amount}
+    if instance._previous is not None:
+        ingredient_id, amount = instance._previous
+        changes[ingredient_id] = changes.get(ingredient_id, 0) - amount
+    shopping_list.ingredients_changed(instance.recipe_id, changes)
+
+
+@receiver(post_delete, sender=IngredientRecipe)
+def subtract_from_shopping_lists(sender, instance, **kwargs):
+    shopping_list.ingredients_changed(
+        instance.recipe_id, {instance.ingredient_id: -instance.amount}
+    )
+
+
+@receiver(post_save, sender=Recipe)
+@receiver(post_delete, sender=Recipe)
+def bump_recipes_version(sender, **kwargs):
+    versions.bump(versions.RECIPES)
+
+
+@receiver(post_save, sender=Tag)
+@receiver(post_delete, sender=Tag)
+@receiver(post_save, sender=Ingredient)
+@receiver(post_delete, sender=Ingredient)
+def bump_catalog_version(sender, **kwargs):
+    versions.bump(versions.CATALOG)
+
+
+@receiver(post_save, sender=Favorite)
+@receiver(post_save, sender=ShoppingCart)
+def recipe_marked(sender, instance, created, **kwargs):
+    if created:
+        relations.changed(
+            sender, instance.user_id, added=[instance.recipe_id]
+        )
+
+
+@receiver(post_delete, sender=Favorite)
+@receiver(post_delete, sender=ShoppingCart)
+def recipe_unmarked(sender, instance, **kwargs):
+    relations.changed(sender, instance.user_id, removed=[instance.recipe_id])
+
+
+@receiver(post_save, sender=Recipe)
+def increment_recipes_count(sender, instance, created, **kwargs):
+    if created:
+        counters.change(User, instance.author_id, 'recipes_count', 1)
+
+
+@receiver(post_delete, sender=Recipe)
+def decrement_recipes_count(sender, instance, **kwargs):
+    counters.change(User, instance.author_id, 'recipes_count', -1)
+
+
+@receiver(post_save, sender=Recipe)
+def index_recipe(sender, instance, update_fields=None, **kwargs):
+    if update_fields and not {'name', 'text'} & set(update_fields):
+        return
+    fulltext.index_recipes([(instance.pk, instance.name, instance.text)])
+
+
+@receiver(post_delete, sender=Recipe)
+def unindex_recipe(sender, instance, **kwargs):
+    fulltext.remove_recipe(instance.pk)
+
+
+@receiver(post_save, sender=Recipe)
+def fan_out_recipe(sender, instance, created, **kwargs):
+    if created:
+        tasks.submit_or_call(feed.fan_out, instance.pk)
+
+
+@receiver(post_save, sender=Subscribe)
+def backfill_feed(sender, instance, created, **kwargs):
+    if created:
+        feed.backfill(instance.user_id, instance.following_id)
+
+
+@receiver(post_delete, sender=Subscribe)
+def prune_feed(sender, instance, **kwargs):
+    feed.prune(instance.user_id, instance.following_id)
+
+
+def invalidate_recipes(recipe_ids, touch=True):
+    cards.invalidate(recipe_ids, touch)
+    transaction.on_commit(
+        lambda: response_cache.invalidate_recipes(recipe_ids)
+    )
+
+
+@receiver(post_save, sender=Recipe)
+def invalidate_recipe_read_models(sender, instance, **kwargs):
+    invalidate_recipes([instance.pk], touch=False)
+
+
+@receiver(post_delete, sender=Recipe)
+def invalidate_recipe_responses(sender, instance, **kwargs):
+    pk = instance.pk
+    transaction.on_commit(lambda: response_cache.invalidate_recipes([pk]))
+
+
+@receiver(post_save, sender=IngredientRecipe)
+@receiver(post_delete, sender=IngredientRecipe)
+@receiver(post_save, sender=TagRecipe)
+@receiver(post_delete, sender=TagRecipe)
+def touch_recipe(sender, instance, **kwargs):
+    # Also sets the recipe's updated_at, which changes its ETag.
+    invalidate_recipes([instance.recipe_id])
+    versions.bump(versions.RECIPES)
+
+
+@receiver(post_save, sender=Tag)
+@receiver(post_delete, sender=Tag)
+def invalidate_tag_read_models(sender, instance, **kwargs):
+    invalidate_recipes(list(TagRecipe.objects.filter(
+        tag_id=instance.pk
+    ).values_list('recipe_id', flat=True)))
+
+
+@receiver(post_save, sender=Ingredient)
+@receiver(post_delete, sender=Ingredient)
+def invalidate_ingredient_read_models(sender, instance, **kwargs):
+    invalidate_recipes(list(IngredientRecipe.objects.filter(
+        ingredient_id=instance.pk
+    ).values_list('recipe_id', flat=True)))
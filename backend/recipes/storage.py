@@ -0,0 +1,16 @@
+from django.core.files.storage import FileSystemStorage
+from django.utils.deconstruct import deconstructible
+
+
+@deconstructible
+class ContentAddressedStorage(FileSystemStorage):
+    # File names are content hashes, so an existing file with the same name
+    # already holds the same bytes and is reused instead of being copied.
+
+    def get_available_name(self, name, max_length=None):
+        return name
+
+    def _save(self, name, content):
+        if self.exists(name):
+            return name
+        return super()._save(name, content)
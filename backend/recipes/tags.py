@@ -0,0 +1,23 @@
+from django.conf import settings
+from django.core.cache import cache
+
+from .models import Tag
+
+CACHE_KEY = 'tag-slug-ids'
+
+
+def get_slug_ids():
+    slug_ids = cache.get(CACHE_KEY)
+    if slug_ids is None:
+        slug_ids = dict(Tag.objects.values_list('slug', 'id'))
+        cache.set(CACHE_KEY, slug_ids, settings.TAG_SLUGS_TIMEOUT)
+    return slug_ids
+
+
+def get_tag_ids(slugs):
+    slug_ids = get_slug_ids()
+    return {slug_ids[slug] for slug in slugs if slug in slug_ids}
+
+
+def invalidate():
+    cache.delete(CACHE_KEY)
@@ -0,0 +1,58 @@
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+
+logger = logging.getLogger(__name__)
+
+_lock = threading.Lock()
+_executor = None
+
+
+def get_executor():
+    global _executor
+    with _lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.BACKGROUND_WORKERS,
+                thread_name_prefix='foodgram-task'
+            )
+    return _executor
+
+
+def call(func, *args):
+    try:
+        func(*args)
+    except Exception:
+        logger.exception('Background task %s failed', func.__name__)
+
+
+def run(func, *args):
+    try:
+        call(func, *args)
+    finally:
+        close_old_connections()
+
+
+def submit(func, *args):
+    # Runs func after the current transaction commits: inline when
+    # BACKGROUND_TASKS_EAGER is set, in the process thread pool otherwise.
+    # With BACKGROUND_WORKERS = 0 nothing is queued and the work is left to
+    # a separate worker command.
+    if settings.BACKGROUND_TASKS_EAGER:
+        transaction.on_commit(lambda: func(*args))
+    elif settings.BACKGROUND_WORKERS > 0:
+        transaction.on_commit(
+            lambda: get_executor().submit(run, func, *args)
+        )
+
+
+def submit_or_call(func, *args):
+    # For work no worker command picks up: without a thread pool func runs
+    # in the current thread after the commit instead of being dropped.
+    if settings.BACKGROUND_TASKS_EAGER or settings.BACKGROUND_WORKERS > 0:
+        submit(func, *args)
+    else:
+        transaction.on_commit(lambda: call(func, *args))
@@ -0,0 +1,28 @@
+from django.db.models import F
+
+from .models import ChangeVersion
+
+RECIPES = 'recipes'
+CATALOG = 'catalog'
+USERS = 'users'
+
+
+def user_key(user_id):
+    return f'user:{user_id}'
+
+
+def bump(*keys):
+    for key in keys:
+        if not ChangeVersion.objects.filter(key=key).update(
+            value=F('value') + 1
+        ):
+            ChangeVersion.objects.bulk_create(
+                [ChangeVersion(key=key, value=1)], ignore_conflicts=True
+            )
+
+
+def get_versions(keys):
+    values = dict(ChangeVersion.objects.filter(
+        key__in=keys
+    ).values_list('key', 'value'))
+    return {key: values.get(key, 0) for key in keys}
@@ -0,0 +1,109 @@
+import base64
+from io import BytesIO
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from PIL import Image
+from rest_framework.test import APIClient
+
+from recipes.models import Ingredient, Recipe, Tag
+from users.models import User
+
+URL = '/api/recipes/'
+
+
+@pytest.fixture(autouse=True)
+def isolated_files(settings, tmp_path):
+    settings.MEDIA_ROOT = str(tmp_path / 'media')
+    settings.METRICS_ENABLED = False
+    settings.BACKGROUND_WORKERS = 0
+
+
+@pytest.fixture
+def image():
+    output = BytesIO()
+    Image.new('RGB', (64, 64), (200, 10, 10)).save(output, 'PNG')
+    return 'data:image/png;base64,' + base64.b64encode(
+        output.getvalue()
+    ).decode()
+
+
+@pytest.fixture
+def client():
+    user = User.objects.create_user(
+        email='author@example.com', username='author', first_name='Имя',
+        last_name='Фамилия', password='password-123'
+    )
+    client = APIClient()
+    client.force_authenticate(user)
+    return client
+
+
+@pytest.fixture
+def tag():
+    return Tag.objects.create(
+        name='Завтрак', color='#E26C2D', slug='breakfast'
+    )
+
+
+@pytest.fixture
+def ingredients():
+    return Ingredient.objects.bulk_create([
+        Ingredient(name=f'Ингредиент {index}', measurement_unit='г')
+        for index in range(20)
+    ])
+
+
+def get_payload(image, tag, ingredients):
+    return {
+        'name': 'Рецепт',
+        'text': 'Описание',
+        'cooking_time': 10,
+        'image': image,
+        'tags': [tag.id],
+        'ingredients': [
+            {'id': ingredient.id, 'amount': 10} for ingredient in ingredients
+        ],
+    }
+
+
+def count_create_queries(client, payload):
+    with CaptureQueriesContext(connection) as context:
+        response = client.post(URL, payload, format='json')
+    assert response.status_code == 201, response.content
+    return len(context.captured_queries)
+
+
+@pytest.mark.django_db
+def test_create_cost_does_not_depend_on_ingredient_count(
+    client, image, tag, ingredients
+):
+    ingredients = list(Ingredient.objects.order_by('id'))
+    # The first recipe also creates the change version rows.
+    count_create_queries(client, get_payload(image, tag, ingredients[:1]))
+    small = count_create_queries(
+        client, get_payload(image, tag, ingredients[:2])
+    )
+    large = count_create_queries(
+        client, get_payload(image, tag, ingredients[:20])
+    )
+    assert small == large
+    assert Recipe.objects.latest('id').ingredients.count() == 20
+
+
+@pytest.mark.django_db
+def test_create_reports_all_invalid_ids_at_once(
+    client, image, tag, ingredients
+):
+    payload = get_payload(image, tag, Ingredient.objects.order_by('id')[:2])
+    payload['ingredients'] += [
+        {'id': 9001, 'amount': 10}, {'id': 9002, 'amount': 10}
+    ]
+    payload['tags'] += [9003, 9004]
+    response = client.post(URL, payload, format='json')
+    assert response.status_code == 400
+    errors = ' '.join(response.json()['non_field_errors'])
+    assert '9001, 9002' in errors
+    assert '9003, 9004' in errors
+    assert not Recipe.objects.exists()
@@ -2,19 +2,25 @@ from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
 
 from .models import Subscribe, User
+from recipes.paginators import EstimatedCountPaginator
 
 
 class UserAdmin(BaseUserAdmin):
     list_display = ('username', 'email', 'first_name', 'last_name', 'id')
-    search_fields = ('username',)
-    list_filter = ('username', 'email')
+    search_fields = ('username', 'email')
+    list_filter = ('is_staff', 'is_active')
+    show_full_result_count = False
+    paginator = EstimatedCountPaginator
     empty_value_display = '-пусто-'
 
 
 class SubscribeAdmin(admin.ModelAdmin):
     list_display = ('user', 'following')
-    search_fields = ('user',)
-    list_filter = ('user',)
+    list_select_related = ('user', 'following')
+    search_fields = ('user__username', 'following__username')
+    raw_id_fields = ('user', 'following')
+    show_full_result_count = False
+    paginator = EstimatedCountPaginator
     empty_value_display = '-пусто-'
 
 
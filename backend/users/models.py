@@ -3,12 +3,35 @@ from django.contrib.auth.validators import UnicodeUsernameValidator
 from django.db import models
 
 
-class User(AbstractUser):
+class CountersMixin:
+    # Counter columns are only changed with F() updates (recipes.counters):
+    # a full save of a loaded instance would write stale values over them.
+    counter_fields = ()
+
+    def save(self, force_insert=False, force_update=False, using=None,
+             update_fields=None):
+        if update_fields is None and not force_insert and (
+            not self._state.adding
+        ):
+            deferred = self.get_deferred_fields()
+            update_fields = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key
+                and field.name not in self.counter_fields
+                and field.attname not in deferred
+            ]
+        super().save(force_insert, force_update, using, update_fields)
+
+
+class User(CountersMixin, AbstractUser):
     username = models.CharField(max_length=150, unique=True,
                                 validators=[UnicodeUsernameValidator])
     email = models.EmailField(max_length=254, unique=True)
     first_name = models.CharField(max_length=150)
     last_name = models.CharField(max_length=150)
+    recipes_count = models.PositiveIntegerField(default=0)
+    followers_count = models.PositiveIntegerField(default=0)
+    counter_fields = ('recipes_count', 'followers_count')
     USERNAME_FIELD = 'email'
     REQUIRED_FIELDS = ['username', 'first_name', 'last_name']
 
@@ -1,7 +1,8 @@
 from djoser.serializers import UserSerializer as USerializer
 from rest_framework import serializers
 
-from .models import Subscribe, User
+from .models import User
+from .utils import get_subscribed_ids
 from recipes.models import Recipe
 
 
@@ -19,9 +20,7 @@ class UserSerializer(USerializer):
         user = self.context['request'].user
         if user.is_anonymous:
             return False
-        return Subscribe.objects.filter(
-            user=user, following__id=obj.id
-        ).exists()
+        return obj.id in get_subscribed_ids(self.context['request'])
 
 
 class RecipeSubscribeSerializer(serializers.ModelSerializer):
@@ -32,7 +31,7 @@ class RecipeSubscribeSerializer(serializers.ModelSerializer):
 
 class SubscribeSerializer(UserSerializer):
     recipes = serializers.SerializerMethodField()
-    recipes_count = serializers.SerializerMethodField()
+    recipes_count = serializers.ReadOnlyField()
 
     class Meta:
         model = User
@@ -41,11 +40,11 @@ class SubscribeSerializer(UserSerializer):
             'is_subscribed', 'recipes', 'recipes_count'
         )
 
-    @staticmethod
-    def get_recipes_count(obj):
-        return Recipe.objects.filter(author__id=obj.id).count()
-
     def get_recipes(self, obj):
+        if hasattr(obj, 'limited_recipes'):
+            return RecipeSubscribeSerializer(
+                obj.limited_recipes, many=True
+            ).data
         request = self.context['request']
         recipes = obj.recipes.all()
         recipes_limit = request.query_params.get('recipes_limit')
@@ -0,0 +1,44 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import Subscribe, User
+from recipes import cards, counters, response_cache, versions
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def bump_users_version(sender, update_fields=None, **kwargs):
+    if update_fields is not None and set(update_fields) <= {'last_login'}:
+        return
+    versions.bump(versions.USERS)
+
+
+@receiver(post_save, sender=Subscribe)
+@receiver(post_delete, sender=Subscribe)
+def bump_subscriber_version(sender, instance, **kwargs):
+    versions.bump(versions.user_key(instance.user_id))
+
+
+@receiver(post_save, sender=Subscribe)
+def increment_followers_count(sender, instance, created, **kwargs):
+    if created:
+        counters.change(User, instance.following_id, 'followers_count', 1)
+
+
+@receiver(post_delete, sender=Subscribe)
+def decrement_followers_count(sender, instance, **kwargs):
+    counters.change(User, instance.following_id, 'followers_count', -1)
+
+
+@receiver(post_save, sender=User)
+def invalidate_author_read_models(sender, instance, update_fields=None,
+                                  **kwargs):
+    if update_fields is not None and set(update_fields) <= {'last_login'}:
+        return
+    recipe_ids = list(instance.recipes.values_list('id', flat=True))
+    if recipe_ids:
+        cards.invalidate(recipe_ids)
+        transaction.on_commit(
+            lambda: response_cache.invalidate_recipes(recipe_ids)
+        )
@@ -0,0 +1,13 @@
+from .models import Subscribe
+
+
+def get_subscribed_ids(request):
+    # Подписки текущего пользователя загружаются одним запросом и
+    # переиспользуются всеми сериализаторами в рамках запроса.
+    subscribed_ids = getattr(request, '_subscribed_ids', None)
+    if subscribed_ids is None:
+        subscribed_ids = set(Subscribe.objects.filter(
+            user=request.user
+        ).values_list('following_id', flat=True))
+        request._subscribed_ids = subscribed_ids
+    return subscribed_ids
@@ -1,3 +1,4 @@
+from django.db.models import OuterRef, Prefetch, Subquery
 from django.shortcuts import get_object_or_404
 from djoser.views import UserViewSet as UVSet
 from rest_framework import status, viewsets
@@ -7,22 +8,51 @@ from rest_framework.response import Response
 
 from .models import Subscribe, User
 from .serializers import SubscribeSerializer, UserSerializer
+from api.mixins import ConditionalGetMixin
+from recipes import versions
+from recipes.models import Recipe
 
 
-class UserViewSet(UVSet):
+class UserViewSet(ConditionalGetMixin, UVSet):
     serializer_class = UserSerializer
     permission_classes = (IsAuthenticatedOrReadOnly,)
+    etag_keys = (versions.USERS,)
 
     def get_queryset(self):
         return User.objects.all()
 
 
-class SubscribeViewSet(viewsets.ModelViewSet):
+class SubscribeViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     serializer_class = SubscribeSerializer
     permission_classes = (IsAuthenticated,)
+    etag_keys = (versions.RECIPES, versions.USERS)
 
     def get_queryset(self):
-        return User.objects.filter(following__user=self.request.user)
+        return User.objects.filter(
+            following__user=self.request.user
+        ).prefetch_related(
+            Prefetch('recipes', queryset=self.get_recipes_queryset(),
+                     to_attr='limited_recipes')
+        ).order_by('id')
+
+    def get_recipes_limit(self):
+        try:
+            recipes_limit = int(self.request.query_params['recipes_limit'])
+        except (KeyError, ValueError):
+            return None
+        return max(recipes_limit, 0)
+
+    def get_recipes_queryset(self):
+        recipes = Recipe.objects.order_by('-pub_date', '-id')
+        recipes_limit = self.get_recipes_limit()
+        if recipes_limit is None:
+            return recipes
+        # Последние recipes_limit рецептов каждого автора одним запросом.
+        return recipes.filter(id__in=Subquery(
+            Recipe.objects.filter(
+                author=OuterRef('author')
+            ).order_by('-pub_date', '-id').values('id')[:recipes_limit]
+        ))
 
     def create(self, request, *args, **kwargs):
         user_id = self.kwargs.get('users_id')